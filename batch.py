@@ -0,0 +1,121 @@
+# batch.py
+"""
+Genererar scheman för alla sjukhus i vardschema.db, ett sjukhus per process.
+
+Varje sjukhus körs med de inställningar chefen sparat på chefsidan
+("Spara inställningar för nattkörning"), annars med standardvärdena. Scheman
+skrivs till Excel, CSV och/eller Parquet i --output och sparas i databasen i en
+gemensam transaktion när alla sjukhus är klara, även de vars filer inte gick att
+skriva. Tänkt att köras som nattjobb:
+
+    python batch.py --output scheman
+    python batch.py --hospital Karolinska Danderyd --start 2025-03-01 --format csv
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+
+from database import get_employees, get_hospital_settings, get_hospitals, save_schedule, transaction
+from scheduler import ScheduleConflictError, config_from_settings, multi_start, run_engine
+from scheduler.config import HOSPITAL_SETTING_DEFAULTS
+from scheduler.export import FORMATS, TABLES, export_schedules
+
+def next_month():
+    first = date.today().replace(day=1)
+    return (first + timedelta(days=32)).replace(day=1)
+
+def hospital_settings(hospital, period_start):
+    """Sparade inställningar ovanpå standardvärdena, med ett nytt frö för körningen."""
+    settings = {**HOSPITAL_SETTING_DEFAULTS, **(get_hospital_settings(hospital) or {})}
+    settings["period_start"] = period_start
+    settings["schedule_seed"] = random.randrange(2 ** 31)
+    return settings
+
+def generate_for_hospital(hospital, employees, settings):
+    """Körs i en egen process. Returnerar (sjukhus, ScheduleResult eller felmeddelande, sekunder)."""
+    start = time.perf_counter()
+    config = config_from_settings(settings)
+    n_starts = int(settings.get("n_starts", 1))
+    try:
+        if n_starts > 1:
+            # Processen är redan en av flera; försöken körs i tur och ordning här
+            result = multi_start(employees, config, n_starts=n_starts, max_workers=1)
+        else:
+            result = run_engine(employees, config)
+    except ScheduleConflictError as e:
+        return hospital, str(e), time.perf_counter() - start
+    return hospital, result, time.perf_counter() - start
+
+def write_files(hospital, result, output, formats, table):
+    """Skriver schemat i varje format; CSV och Parquet innehåller tabellen table, Excel alla tabeller."""
+    base = os.path.join(output, f"{hospital}_{result.config.period_start.isoformat()}")
+    paths = []
+    for fmt in formats:
+        path = f"{base}.{fmt}"
+        if fmt == "csv":
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                export_schedules([(hospital, result)], fmt, f, table)
+        else:
+            export_schedules([(hospital, result)], fmt, path, table)
+        paths.append(path)
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hospital", nargs="+", help="Sjukhus att köra (standard: alla i databasen)")
+    parser.add_argument("--start", type=date.fromisoformat, default=next_month(),
+                        help="Periodens första dag, ÅÅÅÅ-MM-DD (standard: första dagen nästa månad)")
+    parser.add_argument("--output", default="scheman", help="Katalog för de exporterade filerna")
+    parser.add_argument("--format", nargs="+", choices=FORMATS, default=["xlsx", "csv"])
+    parser.add_argument("--table", choices=list(TABLES), default="Schema",
+                        help="Tabell i CSV- och Parquetfilerna (Excel får alla tabeller)")
+    parser.add_argument("--workers", type=int, default=None, help="Antal processer (standard: en per sjukhus)")
+    args = parser.parse_args()
+
+    hospitals = args.hospital or get_hospitals()
+    if not hospitals:
+        print("Inga sjukhus med personal i databasen.")
+        return 0
+    os.makedirs(args.output, exist_ok=True)
+
+    started = time.perf_counter()
+    results = {}
+    failed = []
+    workers = args.workers or min(len(hospitals), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Databasen läses här, så att arbetsprocesserna bara räknar
+        futures = [pool.submit(generate_for_hospital, hospital, get_employees(hospital),
+                               hospital_settings(hospital, args.start))
+                   for hospital in hospitals]
+        for future in as_completed(futures):
+            hospital, result, seconds = future.result()
+            if isinstance(result, str):
+                failed.append(hospital)
+                print(f"{hospital:<20} misslyckades efter {seconds:.2f} s: {result}")
+                continue
+            results[hospital] = result
+            try:
+                paths = write_files(hospital, result, args.output, args.format, args.table)
+            except (RuntimeError, OSError, ValueError) as e:
+                # Schemat sparas ändå i databasen nedan; bara filerna saknas
+                failed.append(hospital)
+                print(f"{hospital:<20} {seconds:6.2f} s, {len(result.slots)} pass, export misslyckades: {e}")
+                continue
+            print(f"{hospital:<20} {seconds:6.2f} s, {len(result.slots)} pass, "
+                  f"{result.unfilled_count()} ofyllda → {', '.join(paths)}")
+
+    with transaction():
+        for hospital, result in results.items():
+            config = result.config
+            save_schedule(hospital, config.period_start, config.dates()[-1], result.assignment_rows(),
+                          engine=config.engine, seed=config.seed)
+    print(f"\n{len(results)} av {len(hospitals)} sjukhus klara på {time.perf_counter() - started:.2f} s, "
+          f"sparade i databasen.")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Prestandamätningar för schemaläggningen. Körs från projektroten, t.ex. python -m benchmarks.bench_solver."""
@@ -0,0 +1,103 @@
+# benchmarks/bench_db.py
+"""
+Stresstest av databaslagret med många samtidiga skrivare.
+
+Varje tråd sparar --saves personalposter via save_employee_prefs. Samma last
+körs mot det gamla mönstret (ny anslutning per anrop, rollback-journal,
+SELECT följt av UPDATE/INSERT) och mot den poolade WAL-anslutningen.
+Rapporterar skrivningar per sekund och antal "database is locked".
+
+    python -m benchmarks.bench_db --threads 1 4 16 --saves 200
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import database
+from benchmarks.synthetic import make_roster
+from scheduler.worktypes import work_type_names
+
+def legacy_save(path, data):
+    """Sparar som database.py gjorde innan anslutningspoolen: en anslutning per anrop."""
+    conn = sqlite3.connect(path)
+    c = conn.cursor()
+    c.execute("SELECT * FROM employees WHERE hospital=? AND name=?", (data["hospital"], data["name"]))
+    exists = c.fetchone()
+    if exists:
+        c.execute('''UPDATE employees SET workload=?, work_types=?, min_days_off=?, experience=?, last_updated=?
+                     WHERE id=?''',
+                  (data["workload"], ",".join(data["work_types"]), data["min_days_off"],
+                   data["experience"], datetime.now(), exists[0]))
+    else:
+        c.execute('''INSERT INTO employees (hospital, name, workload, work_types, min_days_off, experience, last_updated)
+                     VALUES (?,?,?,?,?,?,?)''',
+                  (data["hospital"], data["name"], data["workload"], ",".join(data["work_types"]),
+                   data["min_days_off"], data["experience"], datetime.now()))
+    conn.commit()
+    conn.close()
+
+def pooled_save(path, data):
+    database.save_employee_prefs(data)
+
+def prepare(directory, mode):
+    """Skapar en tom databas i directory och returnerar dess sökväg."""
+    path = os.path.join(directory, f"{mode}.db")
+    if mode == "pooled":
+        database.DB_NAME = path
+        database.init_db()
+    else:
+        conn = sqlite3.connect(path)
+        conn.execute('''CREATE TABLE employees
+                        (id INTEGER PRIMARY KEY AUTOINCREMENT, hospital TEXT, name TEXT, workload INTEGER,
+                         work_types TEXT, min_days_off INTEGER, experience INTEGER, last_updated DATETIME)''')
+        conn.commit()
+        conn.close()
+    return path
+
+def run_writers(save, path, n_threads, saves_per_thread, seed=1):
+    rosters = [[{"hospital": row[1], "name": row[2], "workload": row[3], "work_types": work_type_names(row[4]),
+                 "min_days_off": row[5], "experience": row[6]}
+                for row in make_roster(saves_per_thread, hospital=f"Sjukhus {t}", seed=seed + t)]
+               for t in range(n_threads)]
+    errors = [0] * n_threads
+    barrier = threading.Barrier(n_threads)
+
+    def writer(t):
+        barrier.wait()
+        for data in rosters[t]:
+            try:
+                save(path, data)
+            except sqlite3.OperationalError:
+                errors[t] += 1
+
+    threads = [threading.Thread(target=writer, args=(t,)) for t in range(n_threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+    total = n_threads * saves_per_thread
+    return {"seconds": seconds, "writes_per_s": (total - sum(errors)) / seconds, "locked": sum(errors)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--saves", type=int, default=200, help="Sparningar per tråd")
+    args = parser.parse_args()
+
+    print(f"{'läge':<8}{'trådar':>8}{'sek':>9}{'skriv/s':>10}{'låst':>7}")
+    for n_threads in args.threads:
+        for mode, save in (("legacy", legacy_save), ("pooled", pooled_save)):
+            with tempfile.TemporaryDirectory() as directory:
+                path = prepare(directory, mode)
+                row = run_writers(save, path, n_threads, args.saves)
+                database.close_connections()
+            print(f"{mode:<8}{n_threads:>8}{row['seconds']:>9.2f}{row['writes_per_s']:>10.0f}{row['locked']:>7}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/bench_import.py
+"""
+Mäter kallstart: importtid för modulerna och första renderingen av sidorna.
+
+Varje mätning körs i en ny Python-process i en tom katalog (ingen databasfil,
+inga moduler inlästa), som i en nystartad container. För sidorna räknas bara
+själva sidskriptet; Streamlit och AppTest läses in innan klockan startar.
+Rapporterar medianen av --repeat körningar och vilka tunga paket som lästes in.
+
+    python -m benchmarks.bench_import --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Paket som tar lång tid att läsa in och bara behövs för vissa funktioner
+HEAVY = ["pandas", "numpy", "openpyxl", "pyarrow", "matplotlib", "plotly"]
+
+# Namn -> (förberedelse, det som mäts)
+TARGETS = {
+    "database": ("", "import database"),
+    "roster": ("", "import roster"),
+    "scheduler": ("", "import scheduler"),
+    "Anställdsida": (
+        "from streamlit.testing.v1 import AppTest",
+        "at = AppTest.from_file({page!r}); at.session_state['hospital'] = 'Karolinska'; at.run()",
+    ),
+    "Chefsida": (
+        "from streamlit.testing.v1 import AppTest",
+        "at = AppTest.from_file({page!r}); at.session_state['hospital'] = 'Karolinska'; at.run(timeout=60)",
+    ),
+}
+PAGES = {"Anställdsida": "pages/2_Anstalld.py", "Chefsida": "pages/1_Chefsida.py"}
+
+CHILD = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+{setup}
+before = set(sys.modules)
+start = time.perf_counter()
+{statement}
+seconds = time.perf_counter() - start
+heavy = sorted(m for m in {heavy!r} if m in sys.modules and m not in before)
+print(json.dumps({{"seconds": seconds, "heavy": heavy}}))
+"""
+
+def measure(name):
+    setup, statement = TARGETS[name]
+    page = os.path.join(ROOT, PAGES.get(name, ""))
+    code = CHILD.format(root=ROOT, setup=setup, statement=statement.format(page=page), heavy=HEAVY)
+    with tempfile.TemporaryDirectory() as directory:
+        out = subprocess.run([sys.executable, "-c", code], cwd=directory, capture_output=True,
+                             text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Nya processer per mål, medianen rapporteras")
+    parser.add_argument("--target", nargs="+", choices=list(TARGETS), default=list(TARGETS))
+    args = parser.parse_args()
+
+    print(f"{'mål':<14}{'ms':>9}  tunga paket")
+    for name in args.target:
+        runs = [measure(name) for _ in range(args.repeat)]
+        ms = statistics.median(r["seconds"] for r in runs) * 1000
+        print(f"{name:<14}{ms:>9.0f}  {', '.join(runs[-1]['heavy']) or '-'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# benchmarks/bench_scheduler.py
+"""
+Benchmark av schemageneratorn på syntetiska sjukhus.
+
+Kör den valda motorn över personalstorlekar, periodlängder och kravnivåer och
+skriver väggtid, toppminne, ofyllda pass, rättvisespridning och tid per steg
+till en JSON-fil. Med --compare jämförs resultatet mot en tidigare körning.
+Kräver inte Streamlit.
+
+    python -m benchmarks.bench_scheduler --output bench_results.json
+    python -m benchmarks.bench_scheduler --quick --compare bench_results.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import date, datetime
+from itertools import product
+
+from benchmarks.synthetic import make_roster
+from scheduler import ScheduleConfig, run_engine
+from scheduler.timing import collect
+
+DEFAULT_STAFF = [10, 50, 200, 1000]
+DEFAULT_DAYS = [7, 30, 90]
+# (min_team_size, min_experience_req)
+DEFAULT_REQUIREMENTS = [(1, 1), (3, 8), (5, 15)]
+
+QUICK_STAFF = [10, 50]
+QUICK_DAYS = [7, 30]
+QUICK_REQUIREMENTS = [(1, 1), (3, 8)]
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_case(employees, config, measure_memory=True, repeat=3):
+    """Kör ett fall repeat gånger och rapporterar den snabbaste väggtiden."""
+    seconds = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run_engine(employees, config)
+        elapsed = time.perf_counter() - start
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+
+    # En extra körning med tidsmätning per steg, så att stegen inte påverkar väggtiden ovan
+    with collect() as timings:
+        run_engine(employees, config)
+
+    peak_kib = None
+    if measure_memory:
+        # Separat körning, tracemalloc gör själva körningen långsammare
+        tracemalloc.start()
+        run_engine(employees, config)
+        peak_kib = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+    return {
+        "seconds": round(seconds, 4),
+        "peak_kib": None if peak_kib is None else round(peak_kib, 1),
+        "slots": len(result.slots),
+        "unfilled": result.unfilled_count(),
+        "fairness_spread": round(result.fairness_spread(), 4),
+        "timings": timings.as_dict()
+    }
+
+def run_suite(staff_sizes, periods, requirements, engine="greedy", time_budget=5.0, seed=1,
+              measure_memory=True, repeat=3, progress=print):
+    cases = []
+    for n_staff, days, (team_size, min_exp) in product(staff_sizes, periods, requirements):
+        employees = make_roster(n_staff, seed=seed)
+        config = ScheduleConfig(period_start=date(2025, 2, 16), period_length=days,
+                                min_experience_req=min_exp, min_team_size=team_size,
+                                require_experienced=team_size > 1, seed=seed,
+                                engine=engine, time_budget=time_budget)
+        case = {"staff": n_staff, "days": days, "min_team_size": team_size,
+                "min_experience_req": min_exp, "engine": engine}
+        case.update(run_case(employees, config, measure_memory, repeat))
+        cases.append(case)
+        if progress:
+            progress(format_case(case))
+    return cases
+
+def case_id(case):
+    return (case["engine"], case["staff"], case["days"], case["min_team_size"], case["min_experience_req"])
+
+def format_case(case, baseline=None):
+    line = (f"{case['engine']:<9}{case['staff']:>6}{case['days']:>5}{case['min_team_size']:>5}"
+            f"{case['min_experience_req']:>5}{case['seconds']:>10.3f}"
+            f"{case['peak_kib'] if case['peak_kib'] is not None else '-':>11}"
+            f"{case['unfilled']:>8}{case['fairness_spread']:>9.3f}")
+    if baseline:
+        ratio = case["seconds"] / baseline["seconds"] if baseline["seconds"] else float("inf")
+        line += f"   tid ×{ratio:.2f}, ofyllda {baseline['unfilled']} → {case['unfilled']}"
+    return line
+
+HEADER = f"{'motor':<9}{'pers':>6}{'dag':>5}{'team':>5}{'erf':>5}{'sek':>10}{'topp KiB':>11}{'ofyllda':>8}{'spridn.':>9}"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--staff", type=int, nargs="+")
+    parser.add_argument("--days", type=int, nargs="+")
+    parser.add_argument("--quick", action="store_true", help="Litet rutnät för snabba kontroller")
+    parser.add_argument("--engine", default="greedy", choices=["greedy", "optimize"])
+    parser.add_argument("--budget", type=float, default=5.0, help="Tidsbudget för optimize-motorn")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3, help="Körningar per fall, snabbaste tiden rapporteras")
+    parser.add_argument("--no-memory", action="store_true", help="Hoppa över mätningen av toppminne")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="Tidigare resultatfil att jämföra mot")
+    args = parser.parse_args()
+
+    staff_sizes = args.staff or (QUICK_STAFF if args.quick else DEFAULT_STAFF)
+    periods = args.days or (QUICK_DAYS if args.quick else DEFAULT_DAYS)
+    requirements = QUICK_REQUIREMENTS if args.quick else DEFAULT_REQUIREMENTS
+
+    print(HEADER)
+    print("-" * len(HEADER))
+    cases = run_suite(staff_sizes, periods, requirements, engine=args.engine, time_budget=args.budget,
+                      seed=args.seed, measure_memory=not args.no_memory, repeat=args.repeat)
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "cases": cases
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nResultat sparat i {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = {case_id(c): c for c in json.load(f)["cases"]}
+        print(f"\nJämfört med {args.compare}:")
+        print(HEADER)
+        for case in cases:
+            if case_id(case) in baseline:
+                print(format_case(case, baseline[case_id(case)]))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# benchmarks/bench_solver.py
+"""
+Jämför den giriga motorn (dag för dag) med optimeringsmotorn (hela perioden)
+på syntetiska personalstyrkor: körtid, ofyllda pass och rättvisespridning.
+
+    python -m benchmarks.bench_solver --staff 20 40 --days 30 --budget 5
+"""
+import argparse
+import time
+from datetime import date
+
+from benchmarks.synthetic import make_roster
+from scheduler import ScheduleConfig, generate_schedule, optimize_schedule
+
+def run_case(n_staff, days, min_exp, team_size, budget, seed):
+    employees = make_roster(n_staff, seed=seed)
+    config = ScheduleConfig(period_start=date(2025, 2, 16), period_length=days,
+                            min_experience_req=min_exp, min_team_size=team_size,
+                            require_experienced=True, seed=seed, time_budget=budget)
+    rows = []
+    for engine, func in (("greedy", generate_schedule), ("optimize", optimize_schedule)):
+        start = time.perf_counter()
+        result = func(employees, config)
+        rows.append({
+            "engine": engine,
+            "staff": n_staff,
+            "days": days,
+            "min_experience_req": min_exp,
+            "min_team_size": team_size,
+            "seconds": round(time.perf_counter() - start, 3),
+            "unfilled": result.unfilled_count(),
+            "fairness_spread": round(result.fairness_spread(), 3)
+        })
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--staff", type=int, nargs="+", default=[15, 30, 60])
+    parser.add_argument("--days", type=int, nargs="+", default=[30])
+    parser.add_argument("--min-exp", type=int, default=8)
+    parser.add_argument("--team-size", type=int, default=2)
+    parser.add_argument("--budget", type=float, default=5.0, help="Tidsbudget i sekunder för optimeringen")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    header = f"{'motor':<9}{'personal':>9}{'dagar':>7}{'sek':>9}{'ofyllda':>9}{'spridning':>11}"
+    print(header)
+    print("-" * len(header))
+    for n_staff in args.staff:
+        for days in args.days:
+            for row in run_case(n_staff, days, args.min_exp, args.team_size, args.budget, args.seed):
+                print(f"{row['engine']:<9}{row['staff']:>9}{row['days']:>7}{row['seconds']:>9.3f}"
+                      f"{row['unfilled']:>9}{row['fairness_spread']:>11.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# benchmarks/bench_stream.py
+"""
+Jämför generate_schedule med den dagvisa iter_schedule på långa perioder.
+
+För varje personalstorlek mäts tiden till första dagen (hela genereringen för
+generate_schedule) och toppminnet när schemat exporteras som CSV: först
+genererat i sin helhet och sedan skrivet, respektive skrivet dag för dag med
+export_days. Filen skrivs till os.devnull så att bara schemat syns i minnet.
+
+    python -m benchmarks.bench_stream --staff 50 200 --days 365
+"""
+import argparse
+import os
+import time
+import tracemalloc
+from datetime import date
+
+from benchmarks.synthetic import make_roster
+from scheduler import ScheduleConfig, generate_schedule, iter_schedule
+from scheduler.export import export_days, export_schedules
+
+def measure(function):
+    """Kör function och returnerar (sekunder, toppminne i KiB)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    function()
+    seconds = time.perf_counter() - start
+    peak_kib = tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+    return seconds, peak_kib
+
+def first_day_seconds(employees, config):
+    start = time.perf_counter()
+    next(iter_schedule(employees, config))
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--staff", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--team", type=int, default=3, help="min_team_size")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'personal':>9}{'dagar':>7}{'helt s':>9}{'första dag s':>14}{'helt KiB':>11}{'dagvis KiB':>12}")
+    for n_staff in args.staff:
+        employees = make_roster(n_staff, seed=args.seed)
+        config = ScheduleConfig(period_start=date(2025, 1, 1), period_length=args.days,
+                                min_team_size=args.team, seed=args.seed)
+        with open(os.devnull, "w", newline="") as sink:
+            whole_s, whole_kib = measure(
+                lambda: export_schedules([("Bench", generate_schedule(employees, config))], "csv", sink))
+            _, stream_kib = measure(
+                lambda: export_days("Bench", iter_schedule(employees, config), "csv", sink))
+        first_s = first_day_seconds(employees, config)
+        print(f"{n_staff:>9}{args.days:>7}{whole_s:>9.2f}{first_s:>14.3f}{whole_kib:>11.0f}{stream_kib:>12.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+# benchmarks/synthetic.py
+import random
+from datetime import datetime
+
+from scheduler.worktypes import WORK_TYPES, work_type_mask
+
+FIRST_NAMES = ["Anna", "Erik", "Maria", "Johan", "Sara", "Karl", "Emma", "Lars", "Elin", "Nils",
+               "Ida", "Olof", "Linnea", "Per", "Hanna", "Gustav", "Maja", "Axel", "Frida", "Oskar"]
+LAST_NAMES = ["Andersson", "Johansson", "Karlsson", "Nilsson", "Eriksson", "Larsson", "Olsson",
+              "Persson", "Svensson", "Gustafsson", "Pettersson", "Jonsson", "Lindberg", "Berg"]
+
+def make_roster(n_staff, hospital="Syntetiska", seed=0):
+    """
+    Skapar n_staff rader med samma form som employees-tabellen
+    (id, hospital, name, workload, work_mask, min_days_off, experience, last_updated)
+    med blandad arbetsbelastning, arbetsformer och erfarenhet.
+    """
+    rng = random.Random(seed)
+    now = datetime(2025, 1, 1)
+    rows = []
+    for i in range(n_staff):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}"
+        work_types = rng.sample(WORK_TYPES[:3], rng.randint(1, 3))
+        if rng.random() < 0.2:
+            work_types.append(rng.choice(WORK_TYPES[3:]))
+        rows.append((
+            i + 1,
+            hospital,
+            name,
+            rng.choice([50, 60, 75, 80, 90, 100]),
+            work_type_mask(work_types),
+            rng.randint(1, 3),
+            rng.choices([1, 2, 3, 4, 5, 6], weights=[3, 4, 4, 3, 2, 1])[0],
+            now
+        ))
+    return rows
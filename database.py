@@ -1,89 +1,597 @@
 # database.py
+import csv
+import glob
+import io
+import json
+import logging
+import os
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
+from typing import NamedTuple
+
+from scheduler.timing import timed
+from scheduler.worktypes import WORK_TYPE_BITS, work_type_mask, work_type_names
+
+logger = logging.getLogger("vardschema.database")
 
 DB_NAME = "vardschema.db"
 
-def init_db():
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
+# Hur länge en skrivning väntar på ett lås innan "database is locked" (sekunder)
+BUSY_TIMEOUT = 5.0
+# WAL låter läsare och en skrivare arbeta samtidigt; NORMAL är säkert i WAL-läge
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",
+)
+
+class ConnectionPool:
+    """
+    Återanvändbara SQLite-anslutningar mot en databasfil.
+
+    En tråd som tar en anslutning behåller den tills det yttersta
+    connection()-blocket är klart, så nästlade anrop delar anslutning och
+    transaktion. Lediga anslutningar läggs tillbaka i poolen (högst max_idle)
+    i stället för att stängas. Anslutningarna körs i autocommit-läge;
+    transaktioner öppnas uttryckligen med transaction().
+    """
+    def __init__(self, path, max_idle=8, busy_timeout=BUSY_TIMEOUT):
+        self.path = path
+        self.max_idle = max_idle
+        self.busy_timeout = busy_timeout
+        self._idle = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                               check_same_thread=False)
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            yield conn
+            return
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self._connect()
+        self._local.conn = conn
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            if conn.in_transaction:
+                conn.rollback()
+            with self._lock:
+                if len(self._idle) < self.max_idle:
+                    self._idle.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Kör blocket i en skrivtransaktion (BEGIN IMMEDIATE) som committas om
+        blocket lyckas och rullas tillbaka vid undantag. Inuti en pågående
+        transaktion blir blocket en del av den yttre.
+        """
+        with self.connection() as conn:
+            if conn.in_transaction:
+                yield conn
+                return
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+
+    def close(self):
+        """Stänger alla lediga anslutningar. Utlånade stängs när de lämnas tillbaka."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self.max_idle = 0
+        for conn in idle:
+            conn.close()
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool():
+    """
+    Poolen för DB_NAME, räknat från aktuell katalog som sqlite3.connect gör.
+    Första gången en fil används i processen körs migreringarna som saknas
+    (se _migrate), innan någon annan tråd får en anslutning.
+    """
+    path = os.path.abspath(DB_NAME)
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = ConnectionPool(path)
+            _migrate(pool)
+            _pools[path] = pool
+        return pool
+
+def connection():
+    """Kontexthanterare som lånar en anslutning ur poolen."""
+    return get_pool().connection()
+
+def transaction():
+    """Kontexthanterare för en skrivtransaktion, se ConnectionPool.transaction."""
+    return get_pool().transaction()
+
+def close_connections():
+    """Stänger alla poolade anslutningar, t.ex. innan databasfilen tas bort."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+    _forget_employees()
+
+class Employee(NamedTuple):
+    """En rad ur employees-tabellen. Arbetsformerna lagras som bitmask (se scheduler.worktypes)."""
+    id: int
+    hospital: str
+    name: str
+    workload: int
+    work_mask: int
+    min_days_off: int
+    experience: int
+    last_updated: str
+
+    @property
+    def work_types(self):
+        return work_type_names(self.work_mask)
+
+# Kolumnerna i samma ordning som fälten i Employee
+_SELECT_EMPLOYEES = f"SELECT {', '.join(Employee._fields)} FROM employees"
+
+# Anropas med sjukhusnamnet (eller None om det är okänt) efter varje skrivning till employees
+_employee_write_listeners = set()
+
+def add_employee_write_listener(callback):
+    """Registrerar en funktion som anropas när personaldata skrivs. Samma funktion registreras bara en gång."""
+    _employee_write_listeners.add(callback)
+
+def _notify_employee_write(hospital=None):
+    _forget_employees(hospital)
+    for callback in list(_employee_write_listeners):
+        callback(hospital)
+
+# Läscache för get_employees: (databasfil, sjukhus) -> (version, senast kontrollerad, anställda).
+# Versionen i data_versions räknas upp vid varje skrivning, så även skrivningar från
+# andra serverprocesser upptäcks, men högst var EMPLOYEE_CACHE_TTL sekund.
+EMPLOYEE_CACHE_TTL = 2.0
+_employee_cache = {}
+_employee_cache_lock = threading.Lock()
+
+def _forget_employees(hospital=None):
+    with _employee_cache_lock:
+        for key in [k for k in _employee_cache if hospital is None or k[1] == hospital]:
+            del _employee_cache[key]
+
+def _bump_version(conn, hospital):
+    if hospital is None:
+        return
+    conn.execute('''INSERT INTO data_versions (hospital, version) VALUES (?, 1)
+                    ON CONFLICT (hospital) DO UPDATE SET version=version + 1''', (hospital,))
+
+def _read_version(conn, hospital):
+    row = conn.execute("SELECT version FROM data_versions WHERE hospital=?", (hospital,)).fetchone()
+    return row[0] if row else 0
+
+def _hospital_of(conn, employee_id):
+    row = conn.execute("SELECT hospital FROM employees WHERE id=?", (employee_id,)).fetchone()
+    return row[0] if row else None
+
+def _create_employees(conn):
     # Skapa tabellen med de nya fälten (utan max_consec_days)
-    c.execute('''CREATE TABLE IF NOT EXISTS employees
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  hospital TEXT,
-                  name TEXT,
-                  workload INTEGER,
-                  work_types TEXT,
-                  min_days_off INTEGER,
-                  experience INTEGER,
-                  last_updated DATETIME)''')
-    conn.commit()
-    conn.close()
+    conn.execute('''CREATE TABLE IF NOT EXISTS employees
+                    (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                     hospital TEXT,
+                     name TEXT,
+                     workload INTEGER,
+                     work_types TEXT,
+                     min_days_off INTEGER,
+                     experience INTEGER,
+                     last_updated DATETIME)''')
+
+def _unique_employee_names(conn):
+    # Äldre databaser kan ha dubbletter av samma namn (två flikar som sparat samtidigt). Den gamla
+    # koden uppdaterade valfri av dem, så behåll den senast ändrade raden (vid lika: högst id)
+    conn.execute('''DELETE FROM employees WHERE id NOT IN
+                    (SELECT id FROM
+                       (SELECT id, ROW_NUMBER() OVER (PARTITION BY hospital, name
+                                                      ORDER BY last_updated DESC, id DESC) AS rank
+                        FROM employees)
+                     WHERE rank = 1)''')
+    # Indexet börjar på hospital och används därför även av get_employees
+    conn.execute('''CREATE UNIQUE INDEX IF NOT EXISTS idx_employees_hospital_name
+                    ON employees (hospital, name)''')
+
+def _work_type_mask_column(conn):
+    # Arbetsformerna sparas som heltalsmask i stället för kommaseparerad text. Tabellen
+    # byggs om i stället för DROP COLUMN, som kräver SQLite 3.35 (devcontainern har 3.34)
+    conn.create_function("work_types_to_mask", 1,
+                         lambda text: work_type_mask(text.split(",") if text else []), deterministic=True)
+    conn.execute('''CREATE TABLE employees_new
+                    (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                     hospital TEXT,
+                     name TEXT,
+                     workload INTEGER,
+                     min_days_off INTEGER,
+                     experience INTEGER,
+                     last_updated DATETIME,
+                     work_mask INTEGER NOT NULL DEFAULT 0)''')
+    conn.execute('''INSERT INTO employees_new
+                    (id, hospital, name, workload, min_days_off, experience, last_updated, work_mask)
+                    SELECT id, hospital, name, workload, min_days_off, experience, last_updated,
+                           work_types_to_mask(work_types)
+                    FROM employees''')
+    conn.execute("DROP TABLE employees")
+    conn.execute("ALTER TABLE employees_new RENAME TO employees")
+    conn.execute('''CREATE UNIQUE INDEX idx_employees_hospital_name
+                    ON employees (hospital, name)''')
+
+def _schedule_tables(conn):
+    # Genererade scheman och en rad per person och pass, för uppslag utan att generera om
+    conn.execute('''CREATE TABLE IF NOT EXISTS schedules
+                    (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                     hospital TEXT NOT NULL,
+                     period_start DATE NOT NULL,
+                     period_end DATE NOT NULL,
+                     engine TEXT,
+                     seed INTEGER,
+                     created DATETIME)''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS assignments
+                    (schedule_id INTEGER NOT NULL REFERENCES schedules (id) ON DELETE CASCADE,
+                     hospital TEXT NOT NULL,
+                     date DATE NOT NULL,
+                     shift TEXT NOT NULL,
+                     start TEXT,
+                     end TEXT,
+                     employee_id INTEGER NOT NULL)''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_assignments_hospital_date ON assignments (hospital, date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_assignments_employee_date ON assignments (employee_id, date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_assignments_schedule ON assignments (schedule_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_schedules_hospital ON schedules (hospital, period_start)")
+
+def _data_versions(conn):
+    # En räknare per sjukhus som räknas upp vid varje skrivning till employees
+    conn.execute('''CREATE TABLE IF NOT EXISTS data_versions
+                    (hospital TEXT PRIMARY KEY,
+                     version INTEGER NOT NULL)''')
+
+# Tidigare sparades preferenshistoriken som en CSV-fil per sjukhus i den här katalogen
+PREFERENCES_DIR = "preferences"
+
+def _preference_history(conn):
+    # Historik över sparade preferenser; läggs bara till, skrivs aldrig om
+    conn.execute('''CREATE TABLE IF NOT EXISTS preference_history
+                    (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                     hospital TEXT NOT NULL,
+                     user_name TEXT NOT NULL,
+                     saved_at DATETIME NOT NULL,
+                     workload INTEGER,
+                     work_mask INTEGER NOT NULL DEFAULT 0,
+                     min_days_off INTEGER)''')
+    conn.execute('''CREATE INDEX IF NOT EXISTS idx_preference_history_user
+                    ON preference_history (hospital, user_name, saved_at)''')
+    # Engångsimport av de gamla CSV-filerna; migreringen körs bara en gång per databas.
+    # Importen får aldrig stoppa migreringen: trasiga rader och filer loggas och hoppas över
+    for path in sorted(glob.glob(os.path.join(PREFERENCES_DIR, "*_preferenser.csv"))):
+        try:
+            imported, skipped = import_preference_csv(path, conn=conn)
+        except (OSError, csv.Error) as exc:
+            logger.warning("Preferensfilen %s kunde inte läsas in: %s", path, exc)
+            continue
+        if skipped:
+            logger.warning("Preferensfilen %s: %d rader inlästa, %d felaktiga rader överhoppade",
+                           path, imported, skipped)
+
+def _preference_history_by_date(conn):
+    # För historiken över hela sjukhuset, nyast först, utan sortering i efterhand
+    conn.execute('''CREATE INDEX IF NOT EXISTS idx_preference_history_date
+                    ON preference_history (hospital, saved_at)''')
+
+def _hospital_settings(conn):
+    # Chefens sparade schemainställningar per sjukhus som JSON, används av batch.py
+    conn.execute('''CREATE TABLE IF NOT EXISTS hospital_settings
+                    (hospital TEXT PRIMARY KEY,
+                     settings TEXT NOT NULL,
+                     updated DATETIME)''')
+
+# Schemaändringar i ordning; PRAGMA user_version anger hur många som redan körts
+MIGRATIONS = [
+    _create_employees,
+    _unique_employee_names,
+    _work_type_mask_column,
+    _schedule_tables,
+    _data_versions,
+    _preference_history,
+    _preference_history_by_date,
+    _hospital_settings,
+]
+
+def _migrate(pool):
+    """Kör migreringarna som saknas i poolens databas. En aktuell databas kostar bara en läsning."""
+    with pool.connection() as conn:
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= len(MIGRATIONS):
+            return
+    with pool.transaction() as conn:
+        # Läs om under skrivlåset; en annan process kan ha hunnit migrera
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            migration(conn)
+            conn.execute(f"PRAGMA user_version={number}")
+
+def init_db():
+    """
+    Skapar databasen eller uppgraderar en befintlig fil. Behövs sällan: det
+    sker automatiskt första gången DB_NAME används i processen.
+    """
+    get_pool()
+
+# Finns (hospital, name) redan uppdateras raden, annars läggs den till
+_UPSERT_EMPLOYEE = '''INSERT INTO employees
+                      (hospital, name, workload, work_mask, min_days_off, experience, last_updated)
+                      VALUES (?,?,?,?,?,?,?)
+                      ON CONFLICT (hospital, name) DO UPDATE SET
+                      workload=excluded.workload, work_mask=excluded.work_mask,
+                      min_days_off=excluded.min_days_off, experience=excluded.experience,
+                      last_updated=excluded.last_updated'''
+
+def _employee_params(data, now):
+    return (data["hospital"],
+            data["name"],
+            data["workload"],
+            work_type_mask(data["work_types"]),
+            data["min_days_off"],
+            data["experience"],
+            now)
 
 def save_employee_prefs(data):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    
-    # Kolla om posten redan finns
-    c.execute('''SELECT * FROM employees 
-                 WHERE hospital=? AND name=?''',
-              (data["hospital"], data["name"]))
-    exists = c.fetchone()
-    
-    if exists:
-        c.execute('''UPDATE employees SET
-                     workload=?, work_types=?, min_days_off=?, experience=?, last_updated=?
-                     WHERE id=?''',
-                  (data["workload"],
-                   ",".join(data["work_types"]),
-                   data["min_days_off"],
-                   data["experience"],
-                   datetime.now(),
-                   exists[0]))
-    else:
-        c.execute('''INSERT INTO employees 
-                     (hospital, name, workload, work_types, min_days_off, experience, last_updated)
-                     VALUES (?,?,?,?,?,?,?)''',
-                  (data["hospital"],
-                   data["name"],
-                   data["workload"],
-                   ",".join(data["work_types"]),
-                   data["min_days_off"],
-                   data["experience"],
-                   datetime.now()))
-    
-    conn.commit()
-    conn.close()
+    # En enda atomär sats i stället för SELECT följt av UPDATE eller INSERT
+    with transaction() as conn:
+        conn.execute(_UPSERT_EMPLOYEE, _employee_params(data, datetime.now()))
+        _bump_version(conn, data["hospital"])
+    _notify_employee_write(data["hospital"])
+
+def save_employees(rows):
+    """
+    Sparar många anställda (dicts som till save_employee_prefs) med executemany
+    i en enda transaktion; antingen sparas alla eller ingen. Returnerar antalet.
+    """
+    now = datetime.now()
+    with transaction() as conn:
+        conn.executemany(_UPSERT_EMPLOYEE, (_employee_params(data, now) for data in rows))
+        hospitals = {data["hospital"] for data in rows}
+        for hospital in hospitals:
+            _bump_version(conn, hospital)
+    for hospital in hospitals:
+        _notify_employee_write(hospital)
+    return len(rows)
 
+@timed("db.get_employees")
 def get_employees(hospital):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute('''SELECT * FROM employees WHERE hospital=?''', (hospital,))
-    employees = c.fetchall()
-    conn.close()
-    return employees
+    """
+    Sjukhusets anställda som Employee-rader.
+
+    Svaret cachas per sjukhus. Inom EMPLOYEE_CACHE_TTL sekunder från senaste
+    kontrollen är ett anrop bara ett uppslag i en dict; därefter läses
+    versionsräknaren och tabellen läses bara om om den ändrats.
+    """
+    key = (get_pool().path, hospital)
+    now = time.monotonic()
+    with _employee_cache_lock:
+        cached = _employee_cache.get(key)
+    if cached is not None and now - cached[1] < EMPLOYEE_CACHE_TTL:
+        return list(cached[2])
+    with connection() as conn:
+        # Versionen läses före raderna, så raderna är minst lika nya som versionen
+        version = _read_version(conn, hospital)
+        if cached is not None and cached[0] == version:
+            employees = cached[2]
+        else:
+            rows = conn.execute(f"{_SELECT_EMPLOYEES} WHERE hospital=?", (hospital,)).fetchall()
+            employees = [Employee._make(row) for row in rows]
+    with _employee_cache_lock:
+        _employee_cache[key] = (version, now, employees)
+    return list(employees)
+
+def get_employees_with_work_type(hospital, work_type):
+    """
+    Anställda på sjukhuset som har work_type bland sina arbetsformer, t.ex.
+    alla med Nattjour. Filtreringen görs i SQL på work_mask efter en
+    indexsökning på hospital.
+    """
+    with connection() as conn:
+        rows = conn.execute(f"{_SELECT_EMPLOYEES} WHERE hospital=? AND work_mask & ? != 0",
+                            (hospital, WORK_TYPE_BITS[work_type])).fetchall()
+    return [Employee._make(row) for row in rows]
+
+def iter_employees(hospital, batch_size=1000):
+    """
+    Går igenom sjukhusets anställda i id-ordning, batch_size rader per fråga,
+    utan att hela tabellen läses in eller en anslutning hålls mellan batcherna.
+    """
+    last_id = 0
+    while True:
+        with connection() as conn:
+            rows = conn.execute(f"{_SELECT_EMPLOYEES} WHERE hospital=? AND id>? ORDER BY id LIMIT ?",
+                                (hospital, last_id, batch_size)).fetchall()
+        yield from map(Employee._make, rows)
+        if len(rows) < batch_size:
+            return
+        last_id = rows[-1][0]
 
 def update_employee(data):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute('''UPDATE employees SET
-                 workload=?, work_types=?, min_days_off=?, experience=?, last_updated=?
-                 WHERE id=?''',
-              (data["workload"],
-               ",".join(data["work_types"]),
-               data["min_days_off"],
-               data["experience"],
-               datetime.now(),
-               data["id"]))
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        conn.execute('''UPDATE employees SET
+                        workload=?, work_mask=?, min_days_off=?, experience=?, last_updated=?
+                        WHERE id=?''',
+                     (data["workload"],
+                      work_type_mask(data["work_types"]),
+                      data["min_days_off"],
+                      data["experience"],
+                      datetime.now(),
+                      data["id"]))
+        hospital = _hospital_of(conn, data["id"])
+        _bump_version(conn, hospital)
+    _notify_employee_write(hospital)
 
 def delete_employee(employee_id):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute("DELETE FROM employees WHERE id=?", (employee_id,))
-    conn.commit()
-    conn.close()
-
-# Initiera databasen vid första import
-init_db()
+    with transaction() as conn:
+        hospital = _hospital_of(conn, employee_id)
+        conn.execute("DELETE FROM employees WHERE id=?", (employee_id,))
+        _bump_version(conn, hospital)
+    _notify_employee_write(hospital)
+
+_INSERT_PREFERENCE = '''INSERT INTO preference_history
+                         (hospital, user_name, saved_at, workload, work_mask, min_days_off)
+                         VALUES (?,?,?,?,?,?)'''
+
+def add_preference_history(data, saved_at=None):
+    """Lägger till en rad i preferenshistoriken (samma dict som till save_employee_prefs)."""
+    with transaction() as conn:
+        conn.execute(_INSERT_PREFERENCE,
+                     (data["hospital"],
+                      data["name"],
+                      (saved_at or datetime.now()).strftime("%Y-%m-%d %H:%M:%S"),
+                      data["workload"],
+                      work_type_mask(data["work_types"]),
+                      data["min_days_off"]))
+
+def _read_legacy_text(path):
+    """Filens text som UTF-8, eller Windows-1252 om den inte är giltig UTF-8 (t.ex. sparad från Excel)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        return data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return data.decode("cp1252", errors="replace")
+
+def _preference_csv_row(row, fallback_hospital):
+    """En rad i preference_history från en rad i en gammal preferensfil. Kastar ValueError, KeyError eller TypeError."""
+    workload = row.get("Arbetsbelastning (%)")
+    days_off = row.get("Minsta lediga dagar")
+    return (row.get("Sjukhus") or fallback_hospital,
+            row.get("Användarnamn") or "Anonymous",
+            datetime.fromisoformat(row["Datum"]).strftime("%Y-%m-%d %H:%M:%S"),
+            int(float(workload)) if workload else None,
+            work_type_mask((row.get("Prioriterade arbetsformer") or "").split(",")),
+            int(float(days_off)) if days_off else None)
+
+def import_preference_csv(path, conn=None):
+    """
+    Läser in en gammal preferensfil (preferences/{sjukhus}_preferenser.csv)
+    i preference_history. Rader som inte går att tolka (t.ex. belastning "abc"
+    eller saknad Datum-kolumn) hoppas över. Returnerar (inlästa, överhoppade).
+    """
+    fallback_hospital = os.path.basename(path).rsplit("_preferenser.csv", 1)[0]
+    rows, skipped = [], 0
+    for row in csv.DictReader(io.StringIO(_read_legacy_text(path), newline="")):
+        try:
+            rows.append(_preference_csv_row(row, fallback_hospital))
+        except (ValueError, KeyError, TypeError, OverflowError):
+            skipped += 1
+    if conn is None:
+        with transaction() as conn:
+            conn.executemany(_INSERT_PREFERENCE, rows)
+    else:
+        conn.executemany(_INSERT_PREFERENCE, rows)
+    return len(rows), skipped
+
+def get_preference_history(hospital, user_name=None, limit=-1, offset=0):
+    """
+    Preferenshistorik som (datum, sjukhus, namn, belastning, arbetsformer,
+    lediga dagar), nyast först. Med user_name hämtas bara den personens rader.
+    limit och offset väljer en sida direkt i SQL (limit=-1 ger alla rader);
+    båda fallen går på ett index som redan är sorterat på saved_at.
+    """
+    where, params = ("hospital=? AND user_name=?", (hospital, user_name)) if user_name else ("hospital=?", (hospital,))
+    with connection() as conn:
+        rows = conn.execute(f'''SELECT saved_at, hospital, user_name, workload, work_mask, min_days_off
+                                FROM preference_history WHERE {where}
+                                ORDER BY saved_at DESC, id DESC LIMIT ? OFFSET ?''',
+                            (*params, limit, offset)).fetchall()
+    return [(saved_at[:16], hosp, name, workload, ", ".join(work_type_names(mask)), days_off)
+            for saved_at, hosp, name, workload, mask, days_off in rows]
+
+def get_hospitals():
+    """Alla sjukhus som har personal i databasen, i bokstavsordning."""
+    with connection() as conn:
+        return [row[0] for row in conn.execute("SELECT DISTINCT hospital FROM employees ORDER BY hospital")]
+
+def save_hospital_settings(hospital, settings):
+    """Sparar sjukhusets schemainställningar (en dict med JSON-bara värden)."""
+    with transaction() as conn:
+        conn.execute('''INSERT INTO hospital_settings (hospital, settings, updated) VALUES (?,?,?)
+                        ON CONFLICT (hospital) DO UPDATE SET settings=excluded.settings, updated=excluded.updated''',
+                     (hospital, json.dumps(settings), datetime.now()))
+
+def get_hospital_settings(hospital):
+    """Sjukhusets sparade schemainställningar, eller None om inga sparats."""
+    with connection() as conn:
+        row = conn.execute("SELECT settings FROM hospital_settings WHERE hospital=?", (hospital,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+@timed("db.save_schedule")
+def save_schedule(hospital, period_start, period_end, assignments, engine=None, seed=None):
+    """
+    Sparar ett genererat schema i en transaktion och returnerar dess id.
+
+    assignments är (datum, skift, start, slut, anställd-id)-rader, se
+    ScheduleResult.assignment_rows. Det nya schemat ersätter tidigare sparade
+    scheman för sjukhuset vars perioder överlappar, så att uppslagen nedan
+    alltid ser det senaste schemat för varje dag.
+    """
+    with transaction() as conn:
+        conn.execute('''DELETE FROM schedules WHERE hospital=? AND period_start<=? AND period_end>=?''',
+                     (hospital, period_end.isoformat(), period_start.isoformat()))
+        schedule_id = conn.execute('''INSERT INTO schedules (hospital, period_start, period_end, engine, seed, created)
+                                      VALUES (?,?,?,?,?,?)''',
+                                   (hospital, period_start.isoformat(), period_end.isoformat(),
+                                    engine, seed, datetime.now())).lastrowid
+        conn.executemany('''INSERT INTO assignments (schedule_id, hospital, date, shift, start, end, employee_id)
+                            VALUES (?,?,?,?,?,?,?)''',
+                         ((schedule_id, hospital, *row) for row in assignments))
+    return schedule_id
+
+def get_employee_shifts(employee_id, start, end):
+    """Den anställdes pass från start till och med end som (datum, skift, start, slut), i datumordning."""
+    with connection() as conn:
+        return conn.execute('''SELECT date, shift, start, end FROM assignments
+                               WHERE employee_id=? AND date BETWEEN ? AND ?
+                               ORDER BY date, start''',
+                            (employee_id, start.isoformat(), end.isoformat())).fetchall()
+
+def get_shift_staff(hospital, day, shift):
+    """De som arbetar skiftet shift (t.ex. "Natt") dag day på sjukhuset, som Employee-rader."""
+    columns = ", ".join(f"e.{f}" for f in Employee._fields)
+    with connection() as conn:
+        rows = conn.execute(f'''SELECT {columns} FROM assignments a JOIN employees e ON e.id = a.employee_id
+                                WHERE a.hospital=? AND a.date=? AND a.shift=?
+                                ORDER BY e.name''',
+                            (hospital, day.isoformat(), shift)).fetchall()
+    return [Employee._make(row) for row in rows]
+
+def find_employee(hospital, name):
+    """Den anställda med namnet name på sjukhuset, eller None."""
+    with connection() as conn:
+        row = conn.execute(f"{_SELECT_EMPLOYEES} WHERE hospital=? AND name=?", (hospital, name)).fetchone()
+    return Employee._make(row) if row else None
@@ -1,13 +1,24 @@
 # pages/1_Chefsida.py
 import streamlit as st
-import pandas as pd
 import random
+import time
+from dataclasses import replace
 from datetime import datetime, timedelta
-from io import BytesIO
-from itertools import combinations
+from io import BytesIO, StringIO
 import os
 
-from database import get_employees, update_employee, delete_employee
+from database import (DB_NAME, add_employee_write_listener, close_connections, delete_employee,
+                      get_employees, get_shift_staff, save_hospital_settings, save_schedule,
+                      update_employee)
+from roster import ROSTER_COLUMNS, import_roster, iter_roster_csv
+from scheduler import ScheduleConflictError, ScheduleJob, config_from_settings, repair_schedule
+from scheduler.cache import schedule_cache, schedule_key
+from scheduler.config import HOSPITAL_SETTING_DEFAULTS
+from scheduler.export import FORMATS, MIME_TYPES, TABLES, export_schedules
+from scheduler.render import STYLESHEET, WINDOWS, calendar_windows, render_calendar, render_legend
+from scheduler.timing import collect, stage
+from scheduler.trace import TRACE_LEVEL_NAMES, TRACE_OFF
+from scheduler.worktypes import WORK_TYPES
 
 # ---------- SIDOPPSETTNING ----------
 def setup_page():
@@ -15,6 +26,9 @@ def setup_page():
 
 setup_page()
 
+# Cachade scheman blir inaktuella när personaldata skrivs
+add_employee_write_listener(schedule_cache.invalidate)
+
 LANGUAGES = {
     "sv": {
         "experience_labels": {
@@ -33,7 +47,8 @@ def init_session():
     required_keys = [
         "staff", "hospital", "min_experience_req", "period_start", "period_length",
         "morning_start", "morning_end", "em_start", "em_end", "night_start", "night_end",
-        "min_team_size", "require_experienced", "prioritize_nattjour"
+        "min_team_size", "require_experienced", "prioritize_nattjour", "engine", "time_budget",
+        "n_starts", "schedule_seed", "trace_level", "show_timings"
     ]
     defaults = {
         "staff": [],
@@ -49,7 +64,13 @@ def init_session():
         "night_end": "06:00",
         "min_team_size": 1,             # Minsta antal anställda per pass
         "require_experienced": False,   # Kryssruta: om minst en med erf≥4 krävs
-        "prioritize_nattjour": False    # Kryssruta: om nattpass ska begränsas till Nattjour
+        "prioritize_nattjour": False,   # Kryssruta: om nattpass ska begränsas till Nattjour
+        "engine": "greedy",             # "greedy" (dag för dag) eller "optimize" (hela perioden)
+        "time_budget": 5,               # Sekunder som optimeringen får ta
+        "n_starts": 1,                  # Antal parallella försök, det bästa behålls
+        "schedule_seed": None,          # Slumpfrö för reproducerbara scheman (None = slumpmässigt)
+        "trace_level": TRACE_OFF,       # Hur mycket av genereringen som spåras i "Debug-info"
+        "show_timings": False           # Visa tidsmätning per steg längst ned på sidan
     }
     for key in required_keys:
         if key not in st.session_state:
@@ -58,278 +79,259 @@ def init_session():
 init_session()
 
 # ---------- HJÄLPFUNKTIONER ----------
-def get_initials(name):
-    parts = name.split()
-    return "".join(p[0].upper() for p in parts if p)
-
 def reset_database():
-    if os.path.exists("vardschema.db"):
-        os.remove("vardschema.db")
-        st.success("Databasen har återställts. Starta om applikationen.")
+    if os.path.exists(DB_NAME):
+        # Poolade anslutningar och WAL-filerna måste bort tillsammans med databasfilen
+        close_connections()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(DB_NAME + suffix):
+                os.remove(DB_NAME + suffix)
+        st.success("Databasen har nollställts. Starta om applikationen.")
     else:
         st.info("Ingen databasfil hittades.")
 
-def can_work(emp, day, emp_state):
-    state = emp_state[emp["id"]]
-    if day in state["assigned_days"]:
+def show_roster_import_export():
+    """Import av en hel personallista från CSV/Excel och export av sjukhusets personal."""
+    with st.expander("📥 Importera/exportera personallista"):
+        st.caption("Kolumner: " + ", ".join(ROSTER_COLUMNS) +
+                   ". Arbetsformer separeras med kommatecken. Befintliga namn uppdateras.")
+        uploaded = st.file_uploader("Personallista (CSV eller Excel)", type=["csv", "xlsx"])
+        if uploaded is not None and st.button("Importera personallista"):
+            try:
+                saved, errors = import_roster(uploaded, uploaded.name, st.session_state.hospital)
+            except Exception as e:
+                st.error(f"Kunde inte läsa filen: {str(e)}")
+            else:
+                if saved:
+                    st.success(f"{saved} anställda importerades.")
+                if errors:
+                    st.warning(f"{len(errors)} rader hoppades över:")
+                    st.dataframe([{"Rad": line, "Fel": message} for line, message in errors], hide_index=True)
+        show_roster_export(st.session_state.hospital)
+
+def show_roster_export(hospital):
+    """
+    Export av personallistan som CSV. Filen skapas först när chefen ber om den
+    och sparas i sessionen tills personalen ändras, som i show_export.
+    """
+    employees = get_employees(hospital)
+    export_key = (hospital, len(employees), max((str(e.last_updated) for e in employees), default=""))
+    if st.session_state.get("roster_export_key") != export_key:
+        if not st.button("📤 Exportera personallista (CSV)"):
+            return
+        with stage("page.roster_export"):
+            st.session_state["roster_export_data"] = "".join(iter_roster_csv(hospital))
+        st.session_state["roster_export_key"] = export_key
+    st.download_button("Ladda ner personallista",
+                       data=st.session_state["roster_export_data"],
+                       file_name=f"{hospital}_personal.csv",
+                       mime="text/csv")
+
+# ---------- SCHEMAVISNING ----------
+def current_schedule():
+    """Det schema sessionen senast genererade, om det fortfarande finns i cachen."""
+    key = st.session_state.get("schedule_key")
+    return schedule_cache.get(key) if key else None
+
+def publish_schedule(result):
+    """Sparar schemat i databasen så att anställda kan se sina pass utan att det genereras om."""
+    config = result.config
+    save_schedule(st.session_state["hospital"], config.period_start, config.dates()[-1],
+                  result.assignment_rows(), engine=config.engine, seed=config.seed)
+
+# Hur ofta sidan körs om för att visa framsteg medan ett schema genereras (sekunder)
+JOB_POLL_INTERVAL = 0.5
+# Antal av de senast klara dagarna som visas under genereringen
+PARTIAL_DAYS = 7
+
+def generate_and_store(employees):
+    """
+    Gör schemat för de aktuella inställningarna till sessionens schema. Finns
+    det inte i cachen startas en generering i bakgrunden, se show_schedule_job.
+    """
+    config = config_from_settings(st.session_state)
+    if config.seed is None:
+        # Dra ett frö så att schemat kan cachas och återskapas exakt
+        config = replace(config, seed=random.randrange(2 ** 31))
+    n_starts = st.session_state["n_starts"]
+    key = schedule_key(employees, config, n_starts=n_starts)
+    # Ett enda uppslag: cachen delas av alla sessioner och en annan kan tränga undan schemat
+    cached = schedule_cache.get(key)
+    if cached is not None:
+        st.session_state["schedule_key"] = key
+        publish_schedule(cached)
+        return
+    job = st.session_state.get("schedule_job")
+    if job is not None and not job.done():
+        job.cancel()
+    st.session_state["schedule_job"] = ScheduleJob(employees, config, n_starts=n_starts)
+    st.session_state["schedule_job_key"] = key
+
+def show_schedule_job():
+    """
+    Visar framsteg och delresultat för en pågående generering och tar hand om
+    resultatet när den är klar. Returnerar True medan jobbet pågår.
+    """
+    job = st.session_state.get("schedule_job")
+    if job is None:
+        return False
+    if not job.done():
+        st.progress(job.progress, text=f"Genererar schema... {job.progress:.0%}")
+        if job.cancel_requested:
+            st.info("Avbryter...")
+        elif st.button("⏹️ Avbryt generering"):
+            job.cancel()
+        partial = job.partial
+        if partial is not None and partial.slots:
+            st.caption(f"Delresultat: {len(partial.slots)} pass schemalagda, {partial.unfilled_count()} ofyllda")
+            # Dagarna visas allteftersom de blir klara: den senaste veckan och passen per anställd hittills
+            last = partial.slots[-1]["slot"]["date"]
+            st.markdown(STYLESHEET + render_calendar(partial, last - timedelta(days=PARTIAL_DAYS - 1), last, cache=False),
+                        unsafe_allow_html=True)
+            st.dataframe(partial.summary_rows(), use_container_width=True, hide_index=True)
+        return True
+
+    del st.session_state["schedule_job"]
+    key = st.session_state.pop("schedule_job_key")
+    # Genereringen körs i jobbets tråd och mäts därför för sig, se render_timings nedan
+    job.timings.log()
+    st.session_state["schedule_timings"] = job.timings
+    try:
+        result = job.result()
+    except ScheduleConflictError as e:
+        st.error(str(e))
         return False
-    if state["worked_shifts"] >= state["max_shifts"]:
+    if result is None:
+        st.warning("Genereringen avbröts innan något schema blev klart.")
         return False
-    return True
+    if result.cancelled:
+        # Ett avbrutet schema täcker inte hela perioden: visas men cachas inte som det fullständiga och publiceras inte
+        key = f"{key}-avbruten"
+        days_done = len({item["slot"]["date"] for item in result.slots})
+        st.warning(f"Genereringen avbröts efter {days_done} av {result.config.period_length} dagar. "
+                   "Delresultatet visas nedan.")
+    schedule_cache.put(key, result, hospital=st.session_state["hospital"])
+    st.session_state["schedule_key"] = key
+    if not result.cancelled:
+        publish_schedule(result)
+    return False
 
-def parse_time(start_str, end_str):
-    fmt = "%H:%M"
-    t1 = datetime.strptime(start_str, fmt).time()
-    t2 = datetime.strptime(end_str, fmt).time()
-    if t1 == t2:
-        t2 = datetime.strptime("06:00", fmt).time()
-    return t1, t2
+def repair_current_schedule(result, employee_id):
+    """Reparerar result efter ändring/borttagning av en anställd och gör det till sessionens schema."""
+    if result is None:
+        return None
+    employees = get_employees(st.session_state["hospital"])
+    repaired = repair_schedule(result, employees, employee_id)
+    key = schedule_key(employees, repaired.config, repaired_from=st.session_state["schedule_key"])
+    schedule_cache.put(key, repaired, hospital=st.session_state["hospital"])
+    st.session_state["schedule_key"] = key
+    if not repaired.cancelled:
+        # Ett delresultat skulle ersätta det publicerade schemat för hela perioden
+        publish_schedule(repaired)
+    return repaired
 
-def build_color_coded_pivot(schedule_df):
-    pivot = schedule_df.pivot(index="Datum", columns="Skift", values="Personal (Initialer)")
-    pivot = pivot.fillna("")
-    return pivot.to_html(escape=False)
+def show_calendar(result):
+    """Kalendern en vecka, en månad eller hela perioden i taget; bara fönstret som visas renderas."""
+    dates = sorted({item["slot"]["date"] for item in result.slots})
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        # Långa perioder visas som standard en månad i taget
+        window = st.radio("Visa", WINDOWS, index=2 if len(dates) <= 31 else 1, horizontal=True,
+                          key="calendar_window")
+    pages = calendar_windows(dates, window)
+    if not pages:
+        st.info("Schemat innehåller inga pass")
+        return
+    page = 0
+    with col2:
+        if len(pages) > 1:
+            page = st.selectbox("Sida", range(len(pages)), key="calendar_page",
+                                format_func=lambda i: f"{pages[i][0]:%Y-%m-%d} – {pages[i][1]:%Y-%m-%d}")
+    first, last = pages[min(page, len(pages) - 1)]
+    with stage("page.calendar_html"):
+        calendar_html = render_calendar(result, first, last)
+    st.markdown(STYLESHEET + calendar_html, unsafe_allow_html=True)
+    with st.expander("Färgförklaring"):
+        st.markdown(STYLESHEET + render_legend(result), unsafe_allow_html=True)
+
+def export_data(result, fmt, table):
+    """Exportfilen för result i formatet fmt, som bytes (Excel, Parquet) eller text (CSV)."""
+    schedules = [(st.session_state["hospital"], result)]
+    if fmt == "csv":
+        output = StringIO(newline="")
+        export_schedules(schedules, fmt, output, table)
+        return output.getvalue()
+    output = BytesIO()
+    export_schedules(schedules, fmt, output, table)
+    return output.getvalue()
 
-# ---------- TILLDELNINGSALGORITMEN ----------
-def assign_shifts_for_day(day, shifts, available_staff, emp_state, min_exp_req, min_team_size, debug_logs):
+def show_export(result):
     """
-    Tilldelar pass för en given dag.
-    
-    För varje skift:
-      1. Samla kandidater som kan arbeta idag (via can_work).
-      2. Om skiftet är "Natt" och kryssrutan "Prioritera endast 'Nattjour'" är aktiv,
-         filtrera kandidaterna så att endast de med "Nattjour" i work_types behålls.
-      3. För varje möjlig teamstorlek (från min_team_size upp till antalet kandidater) 
-         sök igenom alla kombinationer.
-         - En kombination accepteras om summan av erfarenhet ≥ min_exp_req.
-         - Om kryssrutan "Kräv minst en med erfarenhet ≥ 4 per pass" är aktiv, måste minst en i teamet ha erf≥4.
-         - Beräkna ett "fairness"-värde (genomsnitt av (worked_shifts / max_shifts) + ett straff om önskad arbetsform inte finns).
-      4. Välj den kombination med lägst fairness-värde (om flera, välj slumpmässigt).
-      5. Uppdatera emp_state och ta bort de tilldelade från available_staff.
-    
-    Returnerar en lista med assignments samt den uppdaterade emp_state.
+    Export i valfritt format. Filen skapas en gång per schema, format och tabell
+    och sparas i sessionen, så nedladdningsknappen finns kvar vid senare omkörningar.
     """
-    assignments = []
-    require_experienced = st.session_state.get("require_experienced", False)
-    prioritize_nattjour = st.session_state.get("prioritize_nattjour", False)
-    shift_pref_map = {
-        "Morgon": "Dagskift",
-        "EM": "Kvällsskift",
-        "Natt": "Nattjour"
-    }
-    
-    for shift_info in shifts:
-        shift_label = shift_info["shift"]
-        day_candidates = [emp for emp in available_staff if can_work(emp, day, emp_state)]
-        debug_logs.append(f"Datum: {day}, Skift: {shift_label}, Kandidater innan filtrering: {len(day_candidates)}")
-        
-        if shift_label == "Natt" and prioritize_nattjour:
-            natt_candidates = [emp for emp in day_candidates if "Nattjour" in emp["work_types"]]
-            if natt_candidates:
-                day_candidates = natt_candidates
-            debug_logs.append(f"Efter nattjour-filtrering: {len(day_candidates)} kandidater")
-        
-        # Sortera kandidater baserat på hur få pass de redan fått (i proportion till max_shifts)
-        day_candidates.sort(key=lambda e: emp_state[e["id"]]["worked_shifts"] / e["max_shifts"])
-        debug_logs.append(f"Efter sortering: {', '.join([e['name'] for e in day_candidates])}")
-        
-        valid_combos = []
-        from itertools import combinations as comb
-        # Sök igenom alla teamkombinationer med storlek från min_team_size upp till antalet kandidater
-        for size in range(min_team_size, len(day_candidates) + 1):
-            for combo in comb(day_candidates, size):
-                total_exp = sum(c["experience"] for c in combo)
-                if total_exp < min_exp_req:
-                    continue
-                if require_experienced and not any(c["experience"] >= 4 for c in combo):
-                    continue
-                # Beräkna fairness: för varje anställd räknas (worked_shifts / max_shifts) + ett straff (1) om önskad arbetsform saknas
-                pref_required = shift_pref_map.get(shift_label)
-                fairness = 0
-                for c in combo:
-                    ratio = emp_state[c["id"]]["worked_shifts"] / c["max_shifts"]
-                    penalty = 0 if (pref_required and pref_required in c["work_types"]) else 1
-                    fairness += (ratio + penalty)
-                fairness /= len(combo)
-                valid_combos.append((combo, fairness))
-        
-        if valid_combos:
-            best_fairness = min(valid_combos, key=lambda x: x[1])[1]
-            best_options = [combo for combo, f in valid_combos if f == best_fairness]
-            chosen = random.choice(best_options)
-            for c in chosen:
-                state = emp_state[c["id"]]
-                state["worked_shifts"] += 1
-                state["last_worked_date"] = day
-                state["assigned_days"].add(day)
-                if c in available_staff:
-                    available_staff.remove(c)
-            debug_logs.append(f"✅ Tilldelat: {[c['name'] for c in chosen]}")
-            assignments.append((shift_info, chosen))
-        else:
-            debug_logs.append(f"❌ Inga giltiga kombinationer för {shift_label} på {day}")
-            assignments.append((shift_info, None))
-    
-    return assignments, emp_state
-
-def generate_schedule(employees):
-    st.info("Genererar schema...")
-    period_start = st.session_state["period_start"]
-    period_length = st.session_state["period_length"]
-    min_exp_req = st.session_state["min_experience_req"]
-    min_team_size = st.session_state["min_team_size"]
-    
-    morning_s, morning_e = parse_time(st.session_state["morning_start"], st.session_state["morning_end"])
-    em_s, em_e = parse_time(st.session_state["em_start"], st.session_state["em_end"])
-    night_s, night_e = parse_time(st.session_state["night_start"], st.session_state["night_end"])
-    
-    shift_types = [
-        {"shift": "Morgon", "start": morning_s.strftime("%H:%M"), "end": morning_e.strftime("%H:%M")},
-        {"shift": "EM",     "start": em_s.strftime("%H:%M"),     "end": em_e.strftime("%H:%M")},
-        {"shift": "Natt",   "start": night_s.strftime("%H:%M"),  "end": night_e.strftime("%H:%M")}
-    ]
-    
-    dates = [period_start + timedelta(days=i) for i in range(period_length)]
-    daily_shifts = {}
-    for d in dates:
-        weekday = d.strftime("%A")
-        daily_shifts[d] = []
-        for stype in shift_types:
-            daily_shifts[d].append({
-                "date": d,
-                "day": weekday,
-                "shift": stype["shift"],
-                "start": stype["start"],
-                "end": stype["end"]
-            })
-    
-    # Konvertera employees till en lista med nödvändiga värden
-    staff = []
-    for e in employees:
+    col1, col2 = st.columns(2)
+    with col1:
+        fmt = st.selectbox("Format", FORMATS, key="export_format",
+                           format_func={"xlsx": "Excel", "csv": "CSV", "parquet": "Parquet"}.get)
+    with col2:
+        table = st.selectbox("Tabell", list(TABLES), key="export_table", disabled=fmt == "xlsx",
+                             help="Excelfilen innehåller alla tabeller som egna flikar")
+    export_key = (st.session_state.get("schedule_key"), fmt, None if fmt == "xlsx" else table)
+    if st.session_state.get("export_key") != export_key:
+        if not st.button("Skapa exportfil"):
+            return
         try:
-            exp_val = int(e[6])  # experience ligger nu på index 6
-        except:
-            exp_val = 0
-        base_max = round((e[3] / 100) * period_length)
-        if base_max < 1:
-            base_max = 1
-        staff.append({
-            "id": e[0],
-            "name": e[2],
-            "workload_percent": e[3],
-            "work_types": e[4].split(",") if e[4] else [],
-            "min_days_off": e[5],
-            "experience": exp_val,
-            "max_shifts": base_max
-        })
-    
-    if st.session_state["require_experienced"]:
-        if not any(s["experience"] >= 4 for s in staff):
-            st.error("Konflikt: Kräver minst en anställd med erfarenhet 4 eller högre, men ingen finns.")
+            with stage("page.export"):
+                st.session_state["export_data"] = export_data(result, fmt, table)
+        except RuntimeError as e:
+            st.error(str(e))
             return
+        st.session_state["export_key"] = export_key
+    config = result.config
+    suffix = "" if fmt == "xlsx" else f"_{table.lower().replace(' ', '_')}"
+    st.download_button(label=f"Ladda ner {fmt}",
+                       data=st.session_state["export_data"],
+                       file_name=f"{st.session_state['hospital']}_{config.period_start.isoformat()}{suffix}.{fmt}",
+                       mime=MIME_TYPES[fmt])
+
+def render_schedule(result):
+    """Visar sammanfattning, kalender, debug-info och export för ett ScheduleResult."""
+    if result.config.seed is not None:
+        st.caption(f"Slumpfrö: {result.config.seed} (ange det nedan för att återskapa exakt samma schema)")
     
-    # Skapa en färgkarta för personalen
-    palette = [
-        "#FFD700", "#ADFF2F", "#FF69B4", "#87CEFA", "#FFA500",
-        "#9370DB", "#40E0D0", "#F08080", "#98FB98", "#F5DEB3",
-        "#C0C0C0", "#B0E0E6", "#FFB6C1", "#D8BFD8", "#BC8F8F",
-        "#FFFFE0", "#B22222", "#DAA520", "#B8860B", "#556B2F"
-    ]
-    color_map = {}
-    for i, s in enumerate(staff):
-        color_map[s["id"]] = palette[i % len(palette)]
-    
-    emp_state = {}
-    for s in staff:
-        emp_state[s["id"]] = {
-            "worked_shifts": 0,
-            "last_worked_date": None,
-            "assigned_days": set(),
-            "max_shifts": s["max_shifts"]
-        }
-    
-    schedule = []
-    failed_days = {}
-    debug_logs = []
-    
-    for day in dates:
-        random.shuffle(staff)
-        available_day = staff.copy()
-        assignments, emp_state = assign_shifts_for_day(
-            day, daily_shifts[day], available_day, emp_state, min_exp_req, min_team_size, debug_logs
-        )
-        for shift_info, combo in assignments:
-            if not combo:
-                if day not in failed_days:
-                    failed_days[day] = []
-                failed_days[day].append(f"{shift_info['shift']} (krav: erf≥{min_exp_req}, minst {min_team_size} pers)")
-            schedule.append({"slot": shift_info, "assigned": combo})
-    
-    if failed_days:
-        err_msgs = []
-        for d, shifts_failed in failed_days.items():
-            ds = d.strftime("%Y-%m-%d")
-            for sf in shifts_failed:
-                err_msgs.append(f"{ds}: {sf}")
-        st.error("Följande pass kunde inte schemaläggas:\n" + "\n".join(err_msgs))
-    
-    summary_rows = []
-    for s in staff:
-        summary_rows.append({"Namn": s["name"], "Pass": emp_state[s["id"]]["worked_shifts"]})
-    summary_df = pd.DataFrame(summary_rows).sort_values("Namn")
+    if result.feasibility is not None and result.feasibility.shortfalls:
+        report = result.feasibility
+        heading = "Förhandskontroll: inställningarna kan inte uppfyllas helt"
+        if report.min_unfilled:
+            heading += f" (minst {report.min_unfilled} av {report.slots} pass blir ofyllda oavsett frö och motor)"
+        st.warning(heading + ".\n\n" + "\n".join(f"- {message}" for message in report.messages()))
     
-    schedule_rows = []
-    for item in schedule:
-        slot = item["slot"]
-        combo = item["assigned"]
-        if combo:
-            initials_html = " ".join(
-                f'<span style="background-color:{color_map[emp["id"]]}; padding:2px 4px; border-radius:3px;">{get_initials(emp["name"])}</span>'
-                for emp in combo)
-        else:
-            initials_html = "–"
-        schedule_rows.append({
-            "Datum": slot["date"].strftime("%Y-%m-%d"),
-            "Veckodag": slot["day"],
-            "Skift": slot["shift"],
-            "Tid": f"{slot['start']} - {slot['end']}",
-            "Personal (Initialer)": initials_html
-        })
+    failed = result.failed_messages()
+    if failed:
+        st.error("Följande pass kunde inte schemaläggas:\n" + "\n".join(failed))
     
-    schedule_df = pd.DataFrame(schedule_rows)
+    with stage("page.summary"):
+        summary = result.summary_rows()
     
     st.subheader("Översikt: Antal pass per anställd")
-    st.dataframe(summary_df, use_container_width=True, hide_index=True)
+    st.dataframe(summary, use_container_width=True, hide_index=True)
     
     st.subheader("Kalenderöversikt för kommande pass")
-    pivot_html = build_color_coded_pivot(schedule_df)
-    st.write(pivot_html, unsafe_allow_html=True)
+    show_calendar(result)
     
-    with st.expander("Debug-info"):
-        for line in debug_logs:
-            st.write(line)
+    if len(result.trace):
+        with st.expander("Debug-info"):
+            if result.trace.dropped:
+                st.caption(f"Endast de senaste {len(result.trace)} händelserna visas ({result.trace.dropped} äldre har tagits bort).")
+            st.dataframe(result.trace.rows(), use_container_width=True, hide_index=True)
+            st.download_button(label="Ladda ner spårning (CSV)",
+                               data=result.trace.to_csv(),
+                               file_name="schema_sparning.csv",
+                               mime="text/csv")
     
-    st.markdown("### Exportera schema till Excel")
-    if st.button("Exportera schema till Excel"):
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            clean_schedule = schedule_df.copy()
-            def strip_html(cell):
-                if cell == "–":
-                    return cell
-                parts = []
-                for segment in cell.split("</span>"):
-                    if "<span" in segment:
-                        txt = segment.split(">")[-1]
-                        parts.append(txt)
-                return " ".join(parts)
-            clean_schedule["Personal (Initialer)"] = clean_schedule["Personal (Initialer)"].apply(strip_html)
-            clean_schedule.to_excel(writer, index=False, sheet_name="Schema")
-            summary_df.to_excel(writer, index=False, sheet_name="Sammanfattning")
-        st.download_button(label="Ladda ner Excel",
-                           data=output.getvalue(),
-                           file_name="schema.xlsx",
-                           mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    st.markdown("### Exportera schema")
+    show_export(result)
     
 def show_chef_interface_wrapper():
     init_session()
@@ -338,20 +340,19 @@ def show_chef_interface_wrapper():
     
     # Knapp för att nollställa databasen
     if st.button("Nollställ databas"):
-        if os.path.exists("vardschema.db"):
-            os.remove("vardschema.db")
-            st.success("Databasen har nollställts. Starta om applikationen.")
-        else:
-            st.info("Ingen databasfil hittades.")
+        reset_database()
     
     st.subheader("Hantera anställda")
+    show_roster_import_export()
     employees = get_employees(st.session_state.hospital)
     if employees:
         emp_options = {f"{e[2]} (ID: {e[0]})": e[0] for e in employees}
         to_delete = st.selectbox("Välj anställd att ta bort", options=list(emp_options.keys()))
         if st.button("Ta bort anställd"):
+            result = current_schedule()
             delete_employee(emp_options[to_delete])
-            st.experimental_rerun()
+            repair_current_schedule(result, emp_options[to_delete])
+            st.rerun()
     else:
         st.info("Inga anställda finns att hantera.")
     
@@ -376,8 +377,8 @@ def show_chef_interface_wrapper():
                                            format_func=lambda x: LANGUAGES["sv"]["experience_labels"][x])
                 with col2:
                     work_types = st.multiselect("Arbetsformer",
-                                                ["Nattjour", "Dagskift", "Kvällsskift", "Helg", "Administration"],
-                                                default=emp_data[4].split(",") if emp_data[4] else [])
+                                                WORK_TYPES,
+                                                default=emp_data.work_types)
                     min_off = st.number_input("Minsta lediga dagar", min_value=1, max_value=3, value=emp_data[5])
                 if st.form_submit_button("💾 Spara ändringar"):
                     update_data = {
@@ -388,8 +389,14 @@ def show_chef_interface_wrapper():
                         "experience": new_exp
                     }
                     try:
+                        result = current_schedule()
                         update_employee(update_data)
                         st.success("Ändringar sparade!")
+                        repaired = repair_current_schedule(result, emp_id)
+                        if repaired is not None:
+                            changed = sum(1 for old, new in zip(result.slots, repaired.slots)
+                                          if [e["id"] for e in old["assigned"] or []] != [e["id"] for e in new["assigned"] or []])
+                            st.info(f"Schemat har reparerats ({changed} pass ändrade).")
                     except Exception as e:
                         st.error(f"Fel vid uppdatering av anställd: {str(e)}")
     
@@ -399,7 +406,7 @@ def show_chef_interface_wrapper():
     with col1:
         st.session_state["period_start"] = st.date_input("Startdatum", value=datetime(2025, 2, 16).date())
     with col2:
-        st.session_state["period_length"] = st.number_input("Antal dagar att schemalägga", min_value=7, max_value=90, value=30)
+        st.session_state["period_length"] = st.number_input("Antal dagar att schemalägga", min_value=7, max_value=365, value=30)
     with col3:
         st.session_state["min_experience_req"] = st.slider("Minsta totala erfarenhetspoäng per pass", 1, 50, 1, step=1)
     with col4:
@@ -412,6 +419,30 @@ def show_chef_interface_wrapper():
                 value=st.session_state.get("prioritize_nattjour", False),
                 key="prioritize_nattjour")
     
+    ENGINE_LABELS = {
+        "greedy": "Snabb (dag för dag)",
+        "optimize": "Optimerad (hela perioden)"
+    }
+    colE, colF, colG, colH = st.columns(4)
+    with colE:
+        st.radio("Schemamotor", options=list(ENGINE_LABELS.keys()),
+                 format_func=lambda x: ENGINE_LABELS[x], key="engine", horizontal=True)
+    with colF:
+        st.number_input("Tidsbudget för optimering (sekunder)", min_value=1, max_value=120,
+                        key="time_budget", disabled=st.session_state["engine"] != "optimize",
+                        help="Räknas om till ett fast antal söksteg, så samma frö ger samma schema")
+    with colG:
+        st.number_input("Antal parallella försök", min_value=1, max_value=64, key="n_starts",
+                        help="Kör flera seedade genereringar samtidigt och behåll det bästa schemat")
+    with colH:
+        st.number_input("Slumpfrö (tomt = slumpmässigt)", min_value=0, step=1, key="schedule_seed")
+    colI, colJ = st.columns(2)
+    with colI:
+        st.selectbox("Spårningsnivå (Debug-info)", options=list(TRACE_LEVEL_NAMES.keys()),
+                     format_func=lambda x: TRACE_LEVEL_NAMES[x], key="trace_level")
+    with colJ:
+        st.checkbox("Visa tidsmätning", key="show_timings")
+    
     st.markdown("### Skiftinställningar")
     colA, colB, colC = st.columns(3)
     with colA:
@@ -431,8 +462,34 @@ def show_chef_interface_wrapper():
         st.session_state["night_end"] = night_end.strftime("%H:%M")
     
     st.markdown("---")
-    if st.button("🚀 Generera schema"):
-        generate_schedule(get_employees(st.session_state["hospital"]))
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("🚀 Generera schema"):
+            generate_and_store(get_employees(st.session_state["hospital"]))
+    with col2:
+        if st.button("💾 Spara inställningar för nattkörning",
+                     help="Används av batch.py när scheman för alla sjukhus genereras"):
+            save_hospital_settings(st.session_state["hospital"],
+                                   {k: st.session_state.get(k, v) for k, v in HOSPITAL_SETTING_DEFAULTS.items()})
+            st.success("Inställningarna har sparats.")
+    job_running = show_schedule_job()
+    # Visas vid varje omkörning, så att t.ex. Excel-exporten använder samma schema
+    result = current_schedule()
+    if result is not None:
+        render_schedule(result)
+
+    with st.expander("🔎 Vem arbetar?"):
+        # Slås upp i det senast sparade schemat, inte i det som visas ovan
+        col1, col2 = st.columns(2)
+        with col1:
+            lookup_day = st.date_input("Datum", value=st.session_state["period_start"], key="lookup_day")
+        with col2:
+            lookup_shift = st.selectbox("Skift", ["Morgon", "EM", "Natt"], index=2, key="lookup_shift")
+        working = get_shift_staff(st.session_state["hospital"], lookup_day, lookup_shift)
+        if working:
+            st.write(", ".join(e.name for e in working))
+        else:
+            st.info("Ingen är schemalagd på det passet.")
     
     st.markdown("---")
     if st.button("🚪 Logga ut"):
@@ -441,4 +498,25 @@ def show_chef_interface_wrapper():
         st.markdown("<meta http-equiv='refresh' content='0; url=https://vardschema.streamlit.app/' />", unsafe_allow_html=True)
         st.stop()
 
-show_chef_interface_wrapper()
+    if job_running:
+        # Kör om sidan strax för att uppdatera förloppet; bara den här sessionen väntar
+        time.sleep(JOB_POLL_INTERVAL)
+        st.rerun()
+
+def render_timings(timings, title="⏱️ Tidsmätning"):
+    """Visar hur lång tid varje steg tog, t.ex. under den här körningen av sidan."""
+    st.markdown("---")
+    st.subheader(title)
+    if timings.stages:
+        st.dataframe(timings.rows(), use_container_width=True, hide_index=True)
+    if timings.counters:
+        st.dataframe([{"Räknare": k, "Värde": v} for k, v in timings.counters.items()],
+                     use_container_width=True, hide_index=True)
+
+with collect() as run_timings:
+    show_chef_interface_wrapper()
+run_timings.log()
+if st.session_state.get("show_timings"):
+    render_timings(run_timings)
+    if st.session_state.get("schedule_timings") is not None:
+        render_timings(st.session_state["schedule_timings"], "⏱️ Tidsmätning, senaste generering")
@@ -1,10 +1,9 @@
 # pages/2_Anstalld.py
-import pandas as pd
-import os
 import streamlit as st
-from datetime import datetime
-from database import save_employee_prefs
-from database import get_employees, update_employee, delete_employee
+from datetime import date, timedelta
+from database import add_preference_history, get_preference_history, save_employee_prefs
+from database import find_employee, get_employee_shifts, get_employees, update_employee, delete_employee
+from scheduler.worktypes import WORK_TYPES
 
 
 # ========== KONFIGURATION ==========
@@ -16,35 +15,50 @@ PREFERENCE_COLUMNS = [
     "Prioriterade arbetsformer",
     "Minsta lediga dagar"
 ]
+HISTORY_PAGE_SIZE = 20
 
 # ========== FUNKTIONER ==========
 def save_preferences(data):
-    """Sparar preferenser till CSV-fil"""
+    """Lägger till preferenserna i historiken"""
     try:
-        os.makedirs("preferences", exist_ok=True)
-        filename = f"preferences/{st.session_state.hospital}_preferenser.csv"
-        
-        new_data = pd.DataFrame([{
-            "Datum": datetime.now().strftime("%Y-%m-%d %H:%M"),
-            "Sjukhus": st.session_state.hospital,
-            "Användarnamn": data.get("name", "Anonymous"),
-            "Arbetsbelastning (%)": data["workload"],
-            "Prioriterade arbetsformer": ", ".join(data["work_types"]),
-            "Minsta lediga dagar": data["min_days_off"]
-        }])
-        
-        if os.path.exists(filename):
-            existing_data = pd.read_csv(filename)
-            updated_data = pd.concat([existing_data, new_data], ignore_index=True)
-        else:
-            updated_data = new_data
-
-        updated_data.to_csv(filename, index=False)
+        add_preference_history(data)
         return True
     except Exception as e:
         st.error(f"Fel vid sparande: {str(e)}")
         return False
 
+def show_preference_history():
+    """Visar historiken en sida i taget, nyast först; bara sidan som visas hämtas från databasen."""
+    user_name = st.session_state.get("user_name", "").strip() or None
+    # Ny person i formuläret: börja om från första sidan
+    if st.session_state.get("history_user") != user_name:
+        st.session_state.history_user = user_name
+        st.session_state.history_page = 0
+    page = st.session_state.get("history_page", 0)
+    try:
+        # En rad extra avslöjar om det finns en nästa sida, utan att räkna alla rader
+        rows = get_preference_history(st.session_state.hospital, user_name,
+                                      limit=HISTORY_PAGE_SIZE + 1, offset=page * HISTORY_PAGE_SIZE)
+    except Exception as e:
+        st.error(f"Kunde inte ladda historik: {str(e)}")
+        return
+    if not rows:
+        st.info("Inga tidigare preferenser hittades" if page == 0 else "Inga fler preferenser")
+    else:
+        st.dataframe([dict(zip(PREFERENCE_COLUMNS, row)) for row in rows[:HISTORY_PAGE_SIZE]],
+                     use_container_width=True, hide_index=True)
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("◀ Nyare", disabled=page == 0):
+            st.session_state.history_page = page - 1
+            st.rerun()
+    with col2:
+        st.caption(f"Sida {page + 1}")
+    with col3:
+        if st.button("Äldre ▶", disabled=len(rows) <= HISTORY_PAGE_SIZE):
+            st.session_state.history_page = page + 1
+            st.rerun()
+
 def main_employee_interface():
     """Huvudgränssnitt för anställda."""
     if 'hospital' not in st.session_state:
@@ -67,7 +81,7 @@ def main_employee_interface():
         st.session_state.workload = workload
 
         work_types = st.multiselect("Prioriterade arbetsformer",
-                                    options=["Nattjour", "Dagskift", "Kvällsskift", "Helg", "Administration"],
+                                    options=WORK_TYPES,
                                     default=["Dagskift"],
                                     help="Välj de arbetsformer du föredrar (flerval möjligt)")
         st.session_state.work_types = work_types
@@ -95,22 +109,24 @@ def main_employee_interface():
                     st.balloons()
 
     st.markdown("---")
-    st.subheader("📜 Tidigare sparade preferenser")
-    try:
-        filename = f"preferences/{st.session_state.hospital}_preferenser.csv"
-        if os.path.exists(filename):
-            history_df = pd.read_csv(filename)
-            if "user_name" in st.session_state and st.session_state.user_name:
-                history_df = history_df[history_df["Användarnamn"] == st.session_state.user_name.strip()]
-            if not history_df.empty:
-                st.dataframe(history_df.sort_values("Datum", ascending=False),
-                             use_container_width=True, hide_index=True)
-            else:
-                st.info("Inga tidigare preferenser hittades")
+    st.subheader("🗓️ Mina pass denna månad")
+    employee = find_employee(st.session_state.hospital, st.session_state.user_name.strip()) \
+        if st.session_state.user_name.strip() else None
+    if employee is None:
+        st.info("Ange ditt namn ovan för att se dina pass")
+    else:
+        first = date.today().replace(day=1)
+        last = (first + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        shifts = get_employee_shifts(employee.id, first, last)
+        if shifts:
+            st.dataframe([dict(zip(["Datum", "Skift", "Start", "Slut"], shift)) for shift in shifts],
+                         use_container_width=True, hide_index=True)
         else:
-            st.info("Inga sparade preferenser ännu")
-    except Exception as e:
-        st.error(f"Kunde inte ladda historik: {str(e)}")
+            st.info("Du har inga schemalagda pass denna månad")
+
+    st.markdown("---")
+    st.subheader("📜 Tidigare sparade preferenser")
+    show_preference_history()
 
     st.markdown("---")
     if st.button("🚪 Logga ut"):
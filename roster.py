@@ -0,0 +1,97 @@
+# roster.py
+import csv
+import io
+import math
+
+from database import iter_employees, save_employees
+from scheduler.worktypes import WORK_TYPES
+
+# Kolumner i en personallista; exporten skriver dessutom id och last_updated
+ROSTER_COLUMNS = ["name", "workload", "work_types", "min_days_off", "experience"]
+EXPORT_COLUMNS = ["id", "hospital", "name", "workload", "work_types", "min_days_off", "experience", "last_updated"]
+
+# Samma gränser som formulären på anställd- och chefsidan
+LIMITS = {
+    "workload": (50, 100),
+    "min_days_off": (1, 3),
+    "experience": (1, 6),
+}
+
+def read_roster(file, filename):
+    """Läser en uppladdad CSV- eller Excelfil till en DataFrame där alla celler är text."""
+    # pandas (och openpyxl för Excel) läses in först när en fil faktiskt importeras
+    import pandas as pd
+
+    if filename.lower().endswith((".xlsx", ".xls")):
+        df = pd.read_excel(file, dtype=str)
+    else:
+        # sep=None känner igen både komma och semikolon (svenska Excel sparar CSV med semikolon)
+        df = pd.read_csv(file, dtype=str, sep=None, engine="python")
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    return df
+
+def _parse_int(value, column):
+    low, high = LIMITS[column]
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None, f"{column}: '{value}' är inte ett tal"
+    if not math.isfinite(number) or number != int(number) or not low <= number <= high:
+        return None, f"{column}: {value} ska vara ett heltal mellan {low} och {high}"
+    return int(number), None
+
+def validate_roster(df, hospital):
+    """
+    Kontrollerar varje rad i en inläst personallista.
+
+    Returnerar (rows, errors) där rows är dicts redo för save_employees och
+    errors är en lista med (radnummer i filen, felmeddelande). Rader med fel
+    tas inte med. Om samma namn förekommer flera gånger gäller den sista raden.
+    """
+    missing = [c for c in ROSTER_COLUMNS if c not in df.columns]
+    if missing:
+        return [], [(1, f"Kolumner saknas: {', '.join(missing)}")]
+
+    rows = {}
+    errors = []
+    values = df[ROSTER_COLUMNS].astype(object).where(df[ROSTER_COLUMNS].notna(), None)
+    # Radnummer som i ett kalkylprogram: rubriken är rad 1
+    for line, (name, workload, work_types, min_days_off, experience) in enumerate(values.itertuples(index=False), start=2):
+        problems = []
+        name = (name or "").strip()
+        if not name:
+            problems.append("name saknas")
+        data = {"hospital": hospital, "name": name}
+        for column, value in (("workload", workload), ("min_days_off", min_days_off), ("experience", experience)):
+            data[column], problem = _parse_int(value, column)
+            if problem:
+                problems.append(problem)
+        data["work_types"] = [w.strip() for w in (work_types or "").replace(";", ",").split(",") if w.strip()]
+        unknown = [w for w in data["work_types"] if w not in WORK_TYPES]
+        if unknown:
+            problems.append(f"work_types: okänd arbetsform {', '.join(unknown)}")
+        if problems:
+            errors.append((line, "; ".join(problems)))
+        else:
+            rows[name] = data
+    return list(rows.values()), errors
+
+def import_roster(file, filename, hospital):
+    """Läser, validerar och sparar en personallista. Returnerar (antal sparade, errors)."""
+    rows, errors = validate_roster(read_roster(file, filename), hospital)
+    saved = save_employees(rows) if rows else 0
+    return saved, errors
+
+def iter_roster_csv(hospital, batch_size=1000):
+    """Exporterar sjukhusets personal som CSV, en textbit per batch, utan att läsa in hela tabellen."""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(EXPORT_COLUMNS)
+    for i, e in enumerate(iter_employees(hospital, batch_size), start=1):
+        writer.writerow([e.id, e.hospital, e.name, e.workload, ",".join(e.work_types),
+                         e.min_days_off, e.experience, e.last_updated])
+        if i % batch_size == 0:
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate()
+    yield output.getvalue()
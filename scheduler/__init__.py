@@ -0,0 +1,35 @@
+# scheduler/__init__.py
+"""
+Schemaläggningsmotorn för VårdSchema, fristående från Streamlit.
+
+Namnen nedan läses in från sina moduler först när de används, så att t.ex.
+database.py kan importera scheduler.worktypes utan att NumPy och hela motorn
+läses in. `from scheduler import run_engine` fungerar som vanligt.
+"""
+import importlib
+
+_EXPORTS = {
+    "scheduler.config": ["ScheduleConfig", "build_shift_templates", "config_from_settings", "parse_time"],
+    "scheduler.engine": ["ScheduleConflictError", "ScheduleDay", "ScheduleResult", "generate_schedule",
+                         "iter_schedule"],
+    "scheduler.feasibility": ["FeasibilityReport", "check_feasibility"],
+    "scheduler.jobs": ["ScheduleJob"],
+    "scheduler.multistart": ["multi_start", "score_result"],
+    "scheduler.repair": ["repair_schedule"],
+    "scheduler.search": ["find_best_team"],
+    "scheduler.solver": ["ENGINES", "optimize_schedule", "run_engine"],
+    "scheduler.staff": ["build_staff", "get_initials"],
+}
+_MODULE_OF = {name: module for module, names in _EXPORTS.items() for name in names}
+__all__ = list(_MODULE_OF)
+
+def __getattr__(name):
+    module = _MODULE_OF.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
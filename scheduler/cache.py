@@ -0,0 +1,55 @@
+# scheduler/cache.py
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import asdict
+
+def schedule_key(employees, config, **options):
+    """
+    Nyckel för ett schema: hash av personalraderna, alla inställningar i config
+    och eventuella extra körningsval (t.ex. n_starts). Raderna innehåller
+    last_updated, så en ändrad anställd ger alltid en ny nyckel.
+    """
+    payload = repr((sorted(employees, key=lambda e: e[0]), sorted(asdict(config).items()), sorted(options.items())))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ScheduleCache:
+    """
+    Begränsad LRU-cache för genererade scheman, delad mellan omkörningar och sessioner
+    i samma process. Varje post märks med sjukhus så att skrivningar till
+    employees-tabellen kan invalidera just det sjukhusets scheman.
+    """
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, result, hospital=None):
+        with self._lock:
+            self._entries[key] = (hospital, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, hospital=None):
+        """Tar bort alla scheman för hospital (None = alla sjukhus)."""
+        with self._lock:
+            for key in [k for k, (h, _) in self._entries.items() if hospital is None or h == hospital]:
+                del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+# Processgemensam cache som Streamlit-sidorna använder
+schedule_cache = ScheduleCache()
@@ -0,0 +1,95 @@
+# scheduler/config.py
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+
+# Vilken arbetsform som motsvarar respektive skift
+SHIFT_PREF_MAP = {
+    "Morgon": "Dagskift",
+    "EM": "Kvällsskift",
+    "Natt": "Nattjour"
+}
+
+DEFAULT_SHIFT_TIMES = {
+    "morning_start": "06:00",
+    "morning_end": "14:00",
+    "em_start": "14:00",
+    "em_end": "22:00",
+    "night_start": "22:00",
+    "night_end": "06:00"
+}
+
+def parse_time(start_str, end_str):
+    fmt = "%H:%M"
+    t1 = datetime.strptime(start_str, fmt).time()
+    t2 = datetime.strptime(end_str, fmt).time()
+    if t1 == t2:
+        t2 = datetime.strptime("06:00", fmt).time()
+    return t1, t2
+
+def build_shift_templates(times=None):
+    """Bygger skiftmallarna (Morgon, EM, Natt) från tider på formen "HH:MM"."""
+    times = {**DEFAULT_SHIFT_TIMES, **(times or {})}
+    templates = []
+    for label, prefix in (("Morgon", "morning"), ("EM", "em"), ("Natt", "night")):
+        start, end = parse_time(times[f"{prefix}_start"], times[f"{prefix}_end"])
+        templates.append({"shift": label, "start": start.strftime("%H:%M"), "end": end.strftime("%H:%M")})
+    return templates
+
+@dataclass
+class ScheduleConfig:
+    """Alla inställningar som styr en schemagenerering, oberoende av Streamlit."""
+    period_start: date
+    period_length: int = 30
+    shift_templates: list = field(default_factory=build_shift_templates)
+    min_experience_req: int = 1
+    min_team_size: int = 1
+    require_experienced: bool = False
+    prioritize_nattjour: bool = False
+    seed: int = None
+    engine: str = "greedy"      # "greedy" (dag för dag) eller "optimize" (hela perioden)
+    time_budget: float = 5.0    # Sekunder för optimize-motorn
+    trace_level: int = 0        # Se scheduler.trace: 0 = av, 1 = info, 2 = debug
+
+    def dates(self):
+        return [self.period_start + timedelta(days=i) for i in range(self.period_length)]
+
+    def shifts_for(self, d):
+        """Dagens pass som dicts med date, day, shift, start, end."""
+        weekday = d.strftime("%A")
+        return [{
+            "date": d,
+            "day": weekday,
+            "shift": stype["shift"],
+            "start": stype["start"],
+            "end": stype["end"]
+        } for stype in self.shift_templates]
+
+# Inställningarna som sparas per sjukhus (för t.ex. nattliga körningar) och deras standardvärden.
+# Frö och spårningsnivå hör till en enskild körning och sparas inte.
+HOSPITAL_SETTING_DEFAULTS = {
+    "period_length": 30,
+    "min_experience_req": 1,
+    "min_team_size": 1,
+    "require_experienced": False,
+    "prioritize_nattjour": False,
+    "engine": "greedy",
+    "time_budget": 5.0,
+    "n_starts": 1,
+    **DEFAULT_SHIFT_TIMES
+}
+
+def config_from_settings(settings):
+    """Skapar en ScheduleConfig från en mapping med sessionsnycklarna (t.ex. st.session_state)."""
+    return ScheduleConfig(
+        period_start=settings["period_start"],
+        period_length=int(settings["period_length"]),
+        shift_templates=build_shift_templates({k: settings[k] for k in DEFAULT_SHIFT_TIMES if k in settings}),
+        min_experience_req=int(settings["min_experience_req"]),
+        min_team_size=int(settings["min_team_size"]),
+        require_experienced=bool(settings.get("require_experienced", False)),
+        prioritize_nattjour=bool(settings.get("prioritize_nattjour", False)),
+        seed=settings.get("schedule_seed"),
+        engine=settings.get("engine", "greedy"),
+        time_budget=float(settings.get("time_budget", 5.0)),
+        trace_level=int(settings.get("trace_level", 0))
+    )
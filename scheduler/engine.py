@@ -0,0 +1,233 @@
+# scheduler/engine.py
+import random
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from scheduler.config import SHIFT_PREF_MAP
+from scheduler.feasibility import check_feasibility
+from scheduler.search import find_best_team
+from scheduler.staff import StaffTable, build_staff
+from scheduler.timing import count, stage
+from scheduler.trace import TRACE_DEBUG, NameList, Trace
+
+
+class ScheduleConflictError(ValueError):
+    """Inställningarna går inte att uppfylla med den personal som finns."""
+
+
+@dataclass
+class ScheduleResult:
+    """
+    Resultatet av en schemagenerering.
+
+    slots är en lista med {"slot": pass, "assigned": [anställda] eller None} i
+    kronologisk ordning och worked_shifts antal tilldelade pass per anställd-id.
+    trace innehåller spårningen på den nivå som config.trace_level anger.
+    cancelled är True om genereringen avbröts och slots bara täcker en del av perioden.
+    feasibility är förhandskontrollen (FeasibilityReport) med de krav som inte kan uppfyllas.
+    """
+    config: object
+    staff: list
+    slots: list = field(default_factory=list)
+    worked_shifts: dict = field(default_factory=dict)
+    failed_days: dict = field(default_factory=dict)
+    trace: Trace = field(default_factory=Trace)
+    cancelled: bool = False
+    feasibility: object = None
+
+    def failed_messages(self):
+        msgs = []
+        for d, shifts_failed in self.failed_days.items():
+            ds = d.strftime("%Y-%m-%d")
+            for sf in shifts_failed:
+                msgs.append(f"{ds}: {sf}")
+        return msgs
+
+    def summary_rows(self):
+        """Antal pass per anställd, sorterat på namn."""
+        rows = [{"Namn": s["name"], "Pass": self.worked_shifts[s["id"]]} for s in self.staff]
+        return sorted(rows, key=lambda r: r["Namn"])
+
+    def unfilled_count(self):
+        return sum(1 for item in self.slots if not item["assigned"])
+
+    def assignment_rows(self):
+        """En rad (datum, skift, start, slut, anställd-id) per tilldelad person, för att spara schemat."""
+        return [(item["slot"]["date"].isoformat(), item["slot"]["shift"], item["slot"]["start"],
+                 item["slot"]["end"], e["id"])
+                for item in self.slots for e in item["assigned"] or []]
+
+    def fairness_spread(self):
+        """Skillnaden mellan högsta och lägsta andel (worked_shifts / max_shifts) av personalen."""
+        if not self.staff:
+            return 0.0
+        ratios = [self.worked_shifts[s["id"]] / s["max_shifts"] for s in self.staff]
+        return max(ratios) - min(ratios)
+
+@dataclass
+class ScheduleDay:
+    """
+    En dag från iter_schedule. slots har samma form som ScheduleResult.slots och
+    failed är skälen för dagens ofyllda pass. worked_shifts är de uppdaterade
+    antalen pass (anställd-id -> antal) för dem som fick pass under dagen; alla
+    andra har samma antal som dagen innan.
+    """
+    index: int
+    date: object
+    slots: list
+    failed: list
+    worked_shifts: dict
+
+def failure_reason(shift_info, config):
+    return f"{shift_info['shift']} (krav: erf≥{config.min_experience_req}, minst {config.min_team_size} pers)"
+
+def filter_nattjour(table, candidates, shift_label, config):
+    """Behåller bara Nattjour-personal på nattpass om prioritize_nattjour är satt och någon sådan finns."""
+    if shift_label == "Natt" and config.prioritize_nattjour:
+        natt_candidates = candidates[table.has_work_type(candidates, "Nattjour")]
+        if len(natt_candidates):
+            return natt_candidates
+    return candidates
+
+def shift_costs(table, candidates, shift_label):
+    """Kostnad per kandidat: (worked_shifts / max_shifts) + 1 om önskad arbetsform saknas."""
+    pref_required = SHIFT_PREF_MAP.get(shift_label)
+    penalty = ~table.has_work_type(candidates, pref_required) if pref_required else np.ones(len(candidates), dtype=bool)
+    return table.ratios(candidates) + penalty
+
+def assign_shifts_for_day(day_index, day, shifts, order, table, config, trace):
+    """
+    Tilldelar pass för en given dag.
+
+    order är dagens (slumpade) ordning av rader i table. För varje skift:
+      1. Kandidater är de som är lediga idag och inte nått max_shifts (table.available).
+      2. Om skiftet är "Natt" och prioritize_nattjour är satt, behålls endast de
+         med "Nattjour" i arbetsformerna (om det finns några).
+      3. Kostnaden per kandidat är (worked_shifts / max_shifts) + ett straff (1)
+         om önskad arbetsform saknas, beräknad för alla kandidater på en gång.
+      4. Välj teamet med lägst genomsnittlig kostnad ("fairness") via find_best_team.
+         - Summan av erfarenhet måste vara ≥ min_experience_req och teamet minst min_team_size stort.
+         - Om require_experienced är satt måste minst en i teamet ha erf≥4.
+         - Vid lika kostnad avgör ordningen i order.
+      5. Markera de valda som upptagna dag day_index i table.
+
+    Returnerar en lista med (pass, [anställda] eller None).
+    """
+    assignments = []
+    
+    for shift_info in shifts:
+        shift_label = shift_info["shift"]
+        candidates = order[table.available(day_index)[order]]
+        count("shifts")
+        count("candidates", len(candidates))
+        trace.debug("kandidater", "Kandidater innan filtrering: {}", len(candidates), day=day, shift=shift_label)
+        
+        if shift_label == "Natt" and config.prioritize_nattjour:
+            candidates = filter_nattjour(table, candidates, shift_label, config)
+            trace.debug("nattjour", "Efter nattjour-filtrering: {} kandidater", len(candidates), day=day, shift=shift_label)
+        
+        # Sortera kandidater baserat på hur få pass de redan fått (i proportion till max_shifts)
+        candidates = candidates[np.argsort(table.ratios(candidates), kind="stable")]
+        if trace.enabled(TRACE_DEBUG):
+            trace.debug("sortering", "Efter sortering: {}", NameList(table.staff, candidates), day=day, shift=shift_label)
+        
+        costs = shift_costs(table, candidates, shift_label)
+        picked, _ = find_best_team(costs, table.experience[candidates], config.min_experience_req,
+                                   config.min_team_size, config.require_experienced)
+        
+        if picked is not None:
+            rows = candidates[picked]
+            table.assign(rows, day_index)
+            chosen = [table.staff[i] for i in rows]
+            trace.info("tilldelat", "✅ Tilldelat: {}", NameList(table.staff, rows), day=day, shift=shift_label)
+            assignments.append((shift_info, chosen))
+        else:
+            trace.info("misslyckat", "❌ Inga giltiga kombinationer", day=day, shift=shift_label)
+            assignments.append((shift_info, None))
+    
+    return assignments
+
+def ensure_feasible(staff, config):
+    """Kör check_feasibility och kastar ScheduleConflictError om inget pass alls kan fyllas."""
+    with stage("engine.feasibility"):
+        report = check_feasibility(staff, config)
+    if report.blocking:
+        raise ScheduleConflictError("Konflikt: " + " ".join(report.messages()))
+    return report
+
+def _iter_days(table, config, trace, cancel=None):
+    """Tilldelar en dag i taget och lämnar en ScheduleDay per dag. Avbryts före nästa dag om cancel är satt."""
+    # Seedad slumpgenerator så att lika bra team väljs reproducerbart (None = ny slump varje körning)
+    rng = random.Random(config.seed)
+    order = list(range(len(table)))
+    row_of = {s["id"]: i for i, s in enumerate(table.staff)}
+    for day_index, day in enumerate(config.dates()):
+        if cancel is not None and cancel.is_set():
+            return
+        rng.shuffle(order)
+        with stage("engine.assign_day"):
+            assignments = assign_shifts_for_day(
+                day_index, day, config.shifts_for(day), np.array(order, dtype=np.int64), table, config, trace
+            )
+        slots = [{"slot": shift_info, "assigned": combo} for shift_info, combo in assignments]
+        failed = [failure_reason(shift_info, config) for shift_info, combo in assignments if not combo]
+        worked = {e["id"]: int(table.worked_shifts[row_of[e["id"]]])
+                  for _, combo in assignments for e in combo or []}
+        yield ScheduleDay(day_index, day, slots, failed, worked)
+
+def _prepare(employees, config, trace):
+    """Personal, StaffTable och förhandskontroll för en generering; brister loggas i trace."""
+    with stage("staff.build"):
+        staff = build_staff(employees, config.period_length)
+        table = StaffTable(staff, config.period_length)
+    report = ensure_feasible(staff, config)
+    for shortfall in report.shortfalls:
+        trace.info("förhandskontroll", "⚠️ {}", shortfall.message)
+    return staff, table, report
+
+def iter_schedule(employees, config, cancel=None, trace=None):
+    """
+    Genererar schemat som generate_schedule men lämnar varje dag (ScheduleDay)
+    så snart den är bestämd, i stället för att samla hela perioden i minnet.
+    Den som läser kan visa eller skriva dagen direkt; långa perioder ger då
+    första dagen utan väntan och minnet växer inte med antalet dagar.
+
+    ScheduleConflictError kastas vid första next() om förhandskontrollen visar
+    att inget pass kan fyllas. trace (standard en ny Trace på config.trace_level)
+    får spårningen. Är cancel satt tar genereringen slut före nästa dag.
+    """
+    trace = Trace(config.trace_level) if trace is None else trace
+    _, table, _ = _prepare(employees, config, trace)
+    yield from _iter_days(table, config, trace, cancel)
+
+def generate_schedule(employees, config, progress=None, cancel=None):
+    """
+    Genererar ett schema för perioden i config.
+
+    employees är rader från employees-tabellen (se build_staff). Kastar
+    ScheduleConflictError om förhandskontrollen (check_feasibility) visar att
+    inget pass alls kan fyllas; då görs ingen sökning.
+
+    progress anropas efter varje dag med (andel klar, delresultat), där
+    delresultatet är det ScheduleResult som byggs upp. cancel är t.ex. ett
+    threading.Event; är det satt avbryts genereringen efter pågående dag och
+    schemat så långt returneras (result.cancelled är då True).
+    """
+    trace = Trace(config.trace_level)
+    staff, table, report = _prepare(employees, config, trace)
+    result = ScheduleResult(config=config, staff=staff, trace=trace, feasibility=report)
+    result.worked_shifts = table.worked_by_id()
+    days_done = 0
+    for day in _iter_days(table, config, trace, cancel):
+        days_done += 1
+        result.slots.extend(day.slots)
+        if day.failed:
+            result.failed_days[day.date] = day.failed
+        if progress is not None:
+            # Ny dict varje dag, så att den som läser delresultatet aldrig ser en halvt uppdaterad
+            result.worked_shifts = {**result.worked_shifts, **day.worked_shifts}
+            progress(days_done / config.period_length, result)
+    result.cancelled = days_done < config.period_length
+    result.worked_shifts = table.worked_by_id()
+    return result
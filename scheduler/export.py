@@ -0,0 +1,148 @@
+# scheduler/export.py
+"""
+Export av genererade scheman till Excel (xlsx), CSV och Parquet.
+
+Allt läses direkt ur ScheduleResult (anställd-id, namn och pass), aldrig ur
+den visade kalendern. schedules är en lista med (sjukhus, ScheduleResult), så
+samma fil kan innehålla flera sjukhus. Raderna skapas en i taget och skrivs
+strömmande: Excel med openpyxl i write_only-läge, Parquet i batchar, så att
+minnet inte växer med periodens längd eller antalet sjukhus. export_days
+skriver i stället dagarna från iter_schedule medan de genereras, utan att
+hela schemat någonsin finns i minnet.
+
+Tabeller (flikar i Excel):
+    Schema      en rad per pass med hela personalen i en cell
+    Pass        en rad per tilldelad person och pass (en rad utan id för ofyllda pass)
+    Per person  en rad per anställd med antal pass och en lista över passen
+"""
+import csv
+
+from scheduler.engine import ScheduleResult
+
+FORMATS = ["xlsx", "csv", "parquet"]
+MIME_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Rader per batch när Parquet skrivs
+PARQUET_BATCH_SIZE = 10_000
+
+def _slots(source):
+    """Passen i source: ett ScheduleResult eller dagarna (ScheduleDay) från iter_schedule."""
+    if isinstance(source, ScheduleResult):
+        return source.slots
+    return (item for day in source for item in day.slots)
+
+def _schema_rows(hospital, source):
+    for item in _slots(source):
+        slot = item["slot"]
+        assigned = item["assigned"] or []
+        yield (hospital, slot["date"], slot["day"], slot["shift"], f"{slot['start']} - {slot['end']}",
+               ", ".join(e["name"] for e in assigned) or "–", ", ".join(str(e["id"]) for e in assigned))
+
+def _pass_rows(hospital, source):
+    for item in _slots(source):
+        slot = item["slot"]
+        common = (hospital, slot["date"], slot["day"], slot["shift"], slot["start"], slot["end"])
+        if not item["assigned"]:
+            yield common + (None, None)
+        for e in item["assigned"] or []:
+            yield common + (e["id"], e["name"])
+
+def _person_rows(hospital, result):
+    if not isinstance(result, ScheduleResult):
+        raise ValueError("Tabellen Per person kräver ett färdigt ScheduleResult")
+    shifts = {s["id"]: [] for s in result.staff}
+    for item in result.slots:
+        slot = item["slot"]
+        for e in item["assigned"] or []:
+            shifts[e["id"]].append(f"{slot['date'].isoformat()} {slot['shift']}")
+    for s in sorted(result.staff, key=lambda s: s["name"]):
+        yield (hospital, s["id"], s["name"], len(shifts[s["id"]]), "; ".join(shifts[s["id"]]))
+
+# Tabellnamn -> ([(kolumn, typ)], radgenerator). Typerna används för Parquet-schemat.
+TABLES = {
+    "Schema": ([("Sjukhus", "text"), ("Datum", "date"), ("Veckodag", "text"), ("Skift", "text"),
+                ("Tid", "text"), ("Personal", "text"), ("Id", "text")], _schema_rows),
+    "Pass": ([("Sjukhus", "text"), ("Datum", "date"), ("Veckodag", "text"), ("Skift", "text"),
+              ("Start", "text"), ("Slut", "text"), ("Id", "int"), ("Namn", "text")], _pass_rows),
+    "Per person": ([("Sjukhus", "text"), ("Id", "int"), ("Namn", "text"), ("Antal pass", "int"),
+                    ("Pass", "text")], _person_rows),
+}
+
+def table_columns(table):
+    return [name for name, _ in TABLES[table][0]]
+
+def iter_table(schedules, table):
+    """Raderna i tabellen table som tupler, sjukhus för sjukhus."""
+    rows = TABLES[table][1]
+    for hospital, result in schedules:
+        yield from rows(hospital, result)
+
+def write_xlsx(schedules, target, tables=None):
+    """Skriver tabellerna (standard alla) som flikar i en Excelfil. target är en sökväg eller en binär fil."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    for table in tables or TABLES:
+        sheet = workbook.create_sheet(table)
+        sheet.append(table_columns(table))
+        for row in iter_table(schedules, table):
+            sheet.append(row)
+    workbook.save(target)
+
+def write_csv(schedules, target, table="Pass"):
+    """Skriver en tabell som CSV till target, en textfil öppnad med newline=""."""
+    writer = csv.writer(target)
+    writer.writerow(table_columns(table))
+    writer.writerows(iter_table(schedules, table))
+
+def write_parquet(schedules, target, table="Pass", batch_size=PARQUET_BATCH_SIZE):
+    """Skriver en tabell som Parquet i batchar om batch_size rader. Kräver pyarrow."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet-export kräver paketet pyarrow (pip install pyarrow)") from None
+
+    types = {"text": pa.string(), "date": pa.date32(), "int": pa.int64()}
+    schema = pa.schema([(name, types[kind]) for name, kind in TABLES[table][0]])
+
+    def to_batch(rows):
+        columns = zip(*rows)
+        return pa.record_batch([pa.array(values, type=f.type) for values, f in zip(columns, schema)], schema=schema)
+
+    with pq.ParquetWriter(target, schema) as writer:
+        batch = []
+        for row in iter_table(schedules, table):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                writer.write_batch(to_batch(batch))
+                batch = []
+        if batch:
+            writer.write_batch(to_batch(batch))
+
+def export_schedules(schedules, fmt, target, table="Pass"):
+    """Skriver schedules i formatet fmt (se FORMATS). table gäller CSV och Parquet; Excel får alla tabeller."""
+    if fmt == "xlsx":
+        write_xlsx(schedules, target)
+    elif fmt == "csv":
+        write_csv(schedules, target, table)
+    elif fmt == "parquet":
+        write_parquet(schedules, target, table)
+    else:
+        raise ValueError(f"Okänt exportformat: {fmt}")
+
+def export_days(hospital, days, fmt, target, table="Pass"):
+    """
+    Skriver dagarna från iter_schedule till target medan de genereras. Dagarna
+    kan bara läsas en gång, så Excelfilen får bara fliken table, och table kan
+    inte vara Per person (som behöver hela perioden).
+    """
+    schedules = [(hospital, days)]
+    if fmt == "xlsx":
+        write_xlsx(schedules, target, tables=[table])
+    else:
+        export_schedules(schedules, fmt, target, table)
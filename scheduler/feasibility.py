@@ -0,0 +1,137 @@
+# scheduler/feasibility.py
+"""
+Snabb förhandskontroll av om inställningarna går att uppfylla med personalen.
+
+Kontrollen räknar bara summor över personalen och antal dagar och pass, så den
+kostar O(personal) oavsett hur svår sökningen är. Den ger en övre gräns för hur
+många pass som kan fyllas: varje pass kräver ett team på minst min_team_size
+personer med erfarenhetssumma ≥ min_experience_req (och en erfaren medlem om
+require_experienced är satt), ingen arbetar mer än ett pass per dag och ingen
+mer än sina max_shifts under perioden.
+"""
+from dataclasses import dataclass, field
+
+from scheduler.search import EXPERIENCED_LEVEL
+from scheduler.worktypes import WORK_TYPE_BITS
+
+
+@dataclass
+class Shortfall:
+    """Ett krav som inte kan uppfyllas: needed behövs men bara available finns."""
+    constraint: str
+    needed: int
+    available: int
+    message: str
+
+    @property
+    def missing(self):
+        return self.needed - self.available
+
+
+@dataclass
+class FeasibilityReport:
+    """
+    Resultatet av check_feasibility. max_fillable är en övre gräns för antal
+    pass som kan fyllas av slots, så minst min_unfilled pass blir ofyllda
+    oavsett motor och frö.
+    """
+    slots: int
+    max_fillable: int
+    shortfalls: list = field(default_factory=list)
+
+    @property
+    def feasible(self):
+        return not self.shortfalls
+
+    @property
+    def blocking(self):
+        """True om inget pass alls kan fyllas; då är sökningen meningslös."""
+        return self.slots > 0 and self.max_fillable == 0
+
+    @property
+    def min_unfilled(self):
+        return self.slots - self.max_fillable
+
+    def messages(self):
+        return [s.message for s in self.shortfalls]
+
+
+def check_feasibility(staff, config):
+    """staff är listan från build_staff. Returnerar en FeasibilityReport."""
+    n_days = config.period_length
+    shifts = [t["shift"] for t in config.shift_templates]
+    per_day = len(shifts)
+    slots = n_days * per_day
+    team = max(1, config.min_team_size)
+    exp_req = config.min_experience_req
+
+    n_staff = len(staff)
+    capacity = sum(s["max_shifts"] for s in staff)
+    total_exp = sum(s["experience"] for s in staff)
+    exp_capacity = sum(s["experience"] * s["max_shifts"] for s in staff)
+    senior = [s for s in staff if s["experience"] >= EXPERIENCED_LEVEL]
+    senior_capacity = sum(s["max_shifts"] for s in senior)
+
+    shortfalls = []
+    # Ett pass per person och dag: dagens pass kräver olika personer
+    teams_per_day = min(per_day, n_staff // team)
+    if n_staff < per_day * team:
+        shortfalls.append(Shortfall(
+            "personal", per_day * team, n_staff,
+            f"Varje dag behövs {per_day * team} personer ({per_day} pass × minst {team}), men bara {n_staff} finns: "
+            f"högst {teams_per_day} av {per_day} pass per dag kan fyllas."))
+    # Alla pass under perioden mot summan av max_shifts
+    fillable = capacity // team
+    if capacity < slots * team:
+        shortfalls.append(Shortfall(
+            "kapacitet", slots * team, capacity,
+            f"Perioden kräver {slots * team} arbetspass ({slots} pass × minst {team} pers), men personalens "
+            f"max antal pass räcker till {capacity} ({slots * team - capacity} för få)."))
+    if exp_req > 0:
+        teams_per_day = min(teams_per_day, total_exp // exp_req)
+        if total_exp < per_day * exp_req:
+            shortfalls.append(Shortfall(
+                "erfarenhet per dag", per_day * exp_req, total_exp,
+                f"Dagens {per_day} pass kräver en erfarenhetssumma på {per_day * exp_req}, men hela "
+                f"personalens erfarenhet är {total_exp}."))
+        fillable = min(fillable, exp_capacity // exp_req)
+        if exp_capacity < slots * exp_req:
+            shortfalls.append(Shortfall(
+                "erfarenhet", slots * exp_req, exp_capacity,
+                f"Periodens pass kräver en erfarenhetssumma på {slots * exp_req}, men personalen kan bidra "
+                f"med högst {exp_capacity} (erfarenhet × max antal pass)."))
+    if config.require_experienced:
+        teams_per_day = min(teams_per_day, len(senior))
+        if not senior:
+            shortfalls.append(Shortfall(
+                "erfaren per dag", per_day, 0,
+                f"Kräver minst en anställd med erfarenhet {EXPERIENCED_LEVEL} eller högre, men ingen finns."))
+        elif len(senior) < per_day:
+            shortfalls.append(Shortfall(
+                "erfaren per dag", per_day, len(senior),
+                f"Varje pass kräver en anställd med erfarenhet ≥{EXPERIENCED_LEVEL}, men bara {len(senior)} finns: "
+                f"högst {len(senior)} av {per_day} pass per dag kan fyllas."))
+        fillable = min(fillable, senior_capacity)
+        if senior and senior_capacity < slots:
+            shortfalls.append(Shortfall(
+                "erfaren", slots, senior_capacity,
+                f"Periodens {slots} pass kräver var sin erfaren medlem, men de erfarna räcker till "
+                f"{senior_capacity} pass."))
+    fillable = min(fillable, n_days * teams_per_day)
+
+    if config.prioritize_nattjour and "Natt" in shifts:
+        # Prioriteringen är ett filter i greedy-motorn och ett straff i optimize, inget hårt krav
+        nattjour = [s for s in staff if s["work_mask"] & WORK_TYPE_BITS["Nattjour"]]
+        nattjour_capacity = sum(s["max_shifts"] for s in nattjour)
+        if nattjour and len(nattjour) < team:
+            shortfalls.append(Shortfall(
+                "nattjour", team, len(nattjour),
+                f"Nattpassen ska ha minst {team} personer men bara {len(nattjour)} har Nattjour: "
+                f"greedy-motorn lämnar nattpassen ofyllda tills de har nått sina max antal pass."))
+        elif nattjour_capacity < n_days * team:
+            shortfalls.append(Shortfall(
+                "nattjour", n_days * team, nattjour_capacity,
+                f"{n_days} nattpass × minst {team} pers kräver {n_days * team} Nattjour-pass, men personalen "
+                f"med Nattjour räcker till {nattjour_capacity}; resten bemannas av annan personal."))
+
+    return FeasibilityReport(slots=slots, max_fillable=max(0, min(slots, fillable)), shortfalls=shortfalls)
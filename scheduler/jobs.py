@@ -0,0 +1,55 @@
+# scheduler/jobs.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from scheduler.multistart import multi_start
+from scheduler.solver import run_engine
+from scheduler.timing import Timings, collect
+
+# Delas av alla sessioner i serverprocessen. Multistart startar dessutom egna processer.
+MAX_JOBS = 4
+_executor = ThreadPoolExecutor(max_workers=MAX_JOBS, thread_name_prefix="vardschema-job")
+
+class ScheduleJob:
+    """
+    En schemagenerering som körs i en bakgrundstråd.
+
+    Handtaget kan sparas i st.session_state och frågas vid varje omkörning:
+    progress är andelen klar (0–1), partial det senaste delresultatet (eller
+    None) och cancel() ber genereringen avbryta så snart som möjligt. När done()
+    är True ger result() schemat eller kastar felet från genereringen.
+    timings samlar motorns tidsmätning; tråden ärver inte sidans collect().
+    """
+    def __init__(self, employees, config, n_starts=1):
+        self.config = config
+        self.n_starts = n_starts
+        self.progress = 0.0
+        self.partial = None
+        self.timings = Timings()
+        self._cancel = threading.Event()
+        self._future = _executor.submit(self._run, employees)
+
+    def _run(self, employees):
+        with collect(self.timings):
+            if self.n_starts > 1:
+                return multi_start(employees, self.config, n_starts=self.n_starts,
+                                   progress=self._report, cancel=self._cancel)
+            return run_engine(employees, self.config, progress=self._report, cancel=self._cancel)
+
+    def _report(self, fraction, partial):
+        self.progress = fraction
+        if partial is not None:
+            self.partial = partial
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    def done(self):
+        return self._future.done()
+
+    def result(self, timeout=None):
+        return self._future.result(timeout)
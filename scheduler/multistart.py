@@ -0,0 +1,77 @@
+# scheduler/multistart.py
+import os
+import random
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import replace
+
+from scheduler.engine import ensure_feasible
+from scheduler.solver import run_engine
+from scheduler.staff import build_staff
+
+def score_result(result):
+    """Lägre är bättre: först antal ofyllda pass, sedan rättvisespridningen."""
+    return (result.unfilled_count(), result.fairness_spread())
+
+def draw_seeds(n_starts, base_seed=None):
+    """Drar n_starts frön; med samma base_seed blir det samma frön varje gång."""
+    rng = random.Random(base_seed)
+    return [rng.randrange(2 ** 31) for _ in range(n_starts)]
+
+def run_seeded(employees, config, seed):
+    """Kör en generering med ett givet frö. Toppnivåfunktion så att den kan skickas till en process."""
+    result = run_engine(employees, replace(config, seed=seed))
+    return score_result(result), result
+
+def multi_start(employees, config, n_starts=8, max_workers=None, progress=None, cancel=None):
+    """
+    Kör n_starts oberoende seedade genereringar, parallellt i en processpool,
+    och returnerar den bästa enligt score_result.
+
+    Fröna dras från config.seed, så samma inställningar ger samma körningar.
+    Det vinnande fröet finns i result.config.seed och reproducerar schemat
+    exakt med run_engine, även med optimize som kör ett fast antal iterationer
+    (utom om dess tidsgräns nåddes, se optimize_schedule). max_workers=1 kör
+    allt i den egna processen.
+
+    progress anropas med (andel klara försök, bästa resultatet hittills) när
+    ett försök blir klart. Sätts cancel väntar man inte in resten av försöken
+    utan returnerar det bästa av de klara (None om inget hunnit bli klart).
+    Visar förhandskontrollen att inget pass kan fyllas kastas
+    ScheduleConflictError innan några försök startas.
+    """
+    ensure_feasible(build_staff(employees, config.period_length), config)
+    seeds = draw_seeds(n_starts, config.seed)
+    if max_workers is None:
+        max_workers = min(n_starts, os.cpu_count() or 1)
+    # Försöken blir klara i godtycklig ordning; vid lika poäng vinner det första fröet
+    runs = {}
+
+    def best_run():
+        return runs[min(runs, key=lambda i: (runs[i][0], i))]
+
+    def finished(i, run):
+        runs[i] = run
+        if progress is not None:
+            progress(len(runs) / n_starts, best_run()[1])
+
+    if max_workers <= 1 or n_starts <= 1:
+        for i, seed in enumerate(seeds):
+            if cancel is not None and cancel.is_set():
+                break
+            finished(i, run_seeded(employees, config, seed))
+    else:
+        pool = ProcessPoolExecutor(max_workers=max_workers)
+        try:
+            pending = {pool.submit(run_seeded, employees, config, seed): i for i, seed in enumerate(seeds)}
+            while pending and not (cancel is not None and cancel.is_set()):
+                done, _ = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finished(pending.pop(future), future.result())
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+    if not runs:
+        return None
+    best_score, best = best_run()
+    best.trace.info("multistart", "Multistart: {} av {} försök, bästa frö {} ({} ofyllda pass, spridning {:.3f})",
+                    len(runs), n_starts, best.config.seed, best_score[0], best_score[1])
+    return best
@@ -0,0 +1,116 @@
+# scheduler/render.py
+"""
+Kalendervy för ett ScheduleResult som HTML.
+
+Schemat läses direkt ur result.slots (anställd-id och namn), och varje cell
+innehåller bara initialer i en <span> med en färgklass. Färgerna ligger i en
+enda stilmall (STYLESHEET) i stället för som inline-stil i varje cell.
+Renderad HTML cachas per schema-hash och fönster, så att en omkörning av
+sidan eller ett byte tillbaka till en tidigare vecka inte bygger om tabellen.
+"""
+import hashlib
+from html import escape
+
+from scheduler.cache import ScheduleCache
+from scheduler.staff import get_initials
+
+PALETTE = [
+    "#FFD700", "#ADFF2F", "#FF69B4", "#87CEFA", "#FFA500",
+    "#9370DB", "#40E0D0", "#F08080", "#98FB98", "#F5DEB3",
+    "#C0C0C0", "#B0E0E6", "#FFB6C1", "#D8BFD8", "#BC8F8F",
+    "#FFFFE0", "#B22222", "#DAA520", "#B8860B", "#556B2F"
+]
+
+# Fönster som kalendern kan visas i: en vecka (måndag–söndag), en kalendermånad eller hela perioden
+WINDOWS = ["Vecka", "Månad", "Hela perioden"]
+
+STYLESHEET = "<style>\n" + "\n".join([
+    ".vs-kalender table {border-collapse: collapse; width: 100%;}",
+    ".vs-kalender th, .vs-kalender td {border: 1px solid #ddd; padding: 4px 6px; text-align: left;}",
+    ".vs-kalender span {padding: 2px 4px; border-radius: 3px; margin-right: 2px; white-space: nowrap;}",
+] + [f".vs-kalender .vs-f{i} {{background-color: {color};}}" for i, color in enumerate(PALETTE)]) + "\n</style>"
+
+# Renderade tabeller, nyckel (schema-hash, första dag, sista dag)
+_rendered = ScheduleCache(max_entries=64)
+
+def color_classes(staff):
+    """Färgklass per anställd-id, i personalens ordning (samma som den gamla färgkartan)."""
+    return {s["id"]: f"vs-f{i % len(PALETTE)}" for i, s in enumerate(staff)}
+
+def schedule_digest(result):
+    """Hash av personal och tilldelningar; två scheman med samma innehåll ger samma hash."""
+    payload = repr(([(s["id"], s["name"]) for s in result.staff],
+                    [(item["slot"]["date"], item["slot"]["shift"],
+                      tuple(e["id"] for e in item["assigned"]) if item["assigned"] else None)
+                     for item in result.slots]))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def calendar_windows(dates, window):
+    """
+    Delar upp periodens datum i sidor. Returnerar en lista med (första, sista)
+    datum per sida; window är ett av WINDOWS.
+    """
+    if not dates:
+        return []
+    if window == "Vecka":
+        page_of = lambda d: d.isocalendar()[:2]
+    elif window == "Månad":
+        page_of = lambda d: (d.year, d.month)
+    else:
+        return [(dates[0], dates[-1])]
+    pages = []
+    for d in dates:
+        if pages and page_of(pages[-1][0]) == page_of(d):
+            pages[-1][1] = d
+        else:
+            pages.append([d, d])
+    return [tuple(p) for p in pages]
+
+def render_calendar(result, first=None, last=None, cache=True):
+    """
+    HTML-tabell med en rad per datum och en kolumn per skift, för datumen
+    first–last (standard: hela schemat). Stilmallen ingår inte, se STYLESHEET.
+    cache=False för scheman som fortfarande växer, t.ex. delresultat under en generering.
+    """
+    if not cache:
+        return _build_calendar(result, first, last)
+    key = (schedule_digest(result), first, last)
+    html = _rendered.get(key)
+    if html is None:
+        html = _build_calendar(result, first, last)
+        _rendered.put(key, html)
+    return html
+
+def _build_calendar(result, first, last):
+    classes = color_classes(result.staff)
+    initials = {s["id"]: escape(get_initials(s["name"])) for s in result.staff}
+    shifts = []
+    days = {}
+    for item in result.slots:
+        slot = item["slot"]
+        if slot["shift"] not in shifts:
+            shifts.append(slot["shift"])
+        if (first is not None and slot["date"] < first) or (last is not None and slot["date"] > last):
+            continue
+        if item["assigned"]:
+            cell = " ".join(f'<span class="{classes[e["id"]]}">{initials[e["id"]]}</span>' for e in item["assigned"])
+        else:
+            cell = "–"
+        days.setdefault(slot["date"], (slot["day"], {}))[1][slot["shift"]] = cell
+
+    parts = ['<div class="vs-kalender"><table><thead><tr><th>Datum</th><th>Veckodag</th>']
+    parts += [f"<th>{escape(shift)}</th>" for shift in shifts]
+    parts.append("</tr></thead><tbody>")
+    for d, (weekday, cells) in days.items():
+        parts.append(f"<tr><td>{d.strftime('%Y-%m-%d')}</td><td>{escape(weekday)}</td>")
+        parts += [f"<td>{cells.get(shift, '')}</td>" for shift in shifts]
+        parts.append("</tr>")
+    parts.append("</tbody></table></div>")
+    return "".join(parts)
+
+def render_legend(result):
+    """Initialer och namn för hela personalen i samma färger som kalendern."""
+    classes = color_classes(result.staff)
+    spans = [f'<span class="{classes[s["id"]]}">{escape(get_initials(s["name"]))}</span> {escape(s["name"])}'
+             for s in sorted(result.staff, key=lambda s: s["name"])]
+    return '<div class="vs-kalender">' + " &nbsp; ".join(spans) + "</div>"
@@ -0,0 +1,113 @@
+# scheduler/repair.py
+import numpy as np
+
+from scheduler.engine import ScheduleResult, failure_reason, filter_nattjour, shift_costs
+from scheduler.feasibility import check_feasibility
+from scheduler.search import EXPERIENCED_LEVEL, cover_requirements, find_best_team, meets_team_requirements
+from scheduler.staff import StaffTable, build_staff
+from scheduler.trace import NameList, Trace
+
+def _table_for(result, staff):
+    """Bygger en StaffTable för staff med arbetade pass och dagar från ett befintligt schema."""
+    table = StaffTable(staff, result.config.period_length)
+    row_of = {s["id"]: i for i, s in enumerate(staff)}
+    day_index = {d: i for i, d in enumerate(result.config.dates())}
+    teams = []
+    for item in result.slots:
+        rows = [row_of[e["id"]] for e in item["assigned"] or [] if e["id"] in row_of]
+        if rows:
+            table.assign(np.array(rows), day_index[item["slot"]["date"]])
+        teams.append(rows)
+    return table, teams, day_index
+
+def _complete_team(table, team, day_index, shift_label, config):
+    """
+    Kompletterar ett befintligt team med de billigaste lediga kandidaterna tills
+    kraven är uppfyllda. Befintliga medlemmar behålls. Returnerar de tillagda
+    raderna eller None om det inte går.
+    """
+    experience = table.experience[team]
+    candidates = filter_nattjour(table, np.flatnonzero(table.available(day_index)), shift_label, config)
+    costs = shift_costs(table, candidates, shift_label)
+    order = np.argsort(costs, kind="stable")
+    added = cover_requirements(
+        costs[order],
+        table.experience[candidates[order]],
+        max(0, config.min_team_size - len(team)),
+        max(0, config.min_experience_req - int(experience.sum())),
+        bool(config.require_experienced and not (experience >= EXPERIENCED_LEVEL).any())
+    )
+    if added is None:
+        return None
+    return candidates[order[added]].tolist()
+
+def repair_schedule(result, employees, employee_id):
+    """
+    Reparerar ett befintligt schema efter att en anställd ändrats eller tagits bort.
+
+    employees är den nya personallistan (rader från employees-tabellen). Finns
+    employee_id inte längre med räknas hen som borttagen. Bara passen som
+    personen hade, och pass som tidigare inte gick att fylla, räknas om:
+      - Har hen fler pass än nya max_shifts släpps de sista passen.
+      - Pass hen lämnat, eller där teamet inte längre uppfyller kraven (t.ex. efter
+        sänkt erfarenhet), kompletteras med lediga kandidater; övriga i teamet behålls.
+      - Ofyllda pass försöker fyllas på nytt, eftersom personen nu kan vara aktuell.
+    Alla andra tilldelningar lämnas orörda. Returnerar ett nytt ScheduleResult, avbrutet om result var det.
+    """
+    config = result.config
+    staff = build_staff(employees, config.period_length)
+    table, teams, day_index = _table_for(result, staff)
+    row_of = {s["id"]: i for i, s in enumerate(staff)}
+    person = row_of.get(employee_id)
+
+    # Pass som måste räknas om: där personen fanns med, plus de som var ofyllda
+    held = [i for i, item in enumerate(result.slots)
+            if any(e["id"] == employee_id for e in item["assigned"] or [])]
+    affected = set(held) | {i for i, item in enumerate(result.slots) if not item["assigned"]}
+
+    if person is not None:
+        surplus = int(table.worked_shifts[person] - table.max_shifts[person])
+        for i in held[len(held) - surplus:] if surplus > 0 else []:
+            teams[i].remove(person)
+            table.worked_shifts[person] -= 1
+            table.assigned[person, day_index[result.slots[i]["slot"]["date"]]] = False
+
+    trace = Trace(config.trace_level)
+    for i in sorted(affected):
+        slot = result.slots[i]["slot"]
+        d = day_index[slot["date"]]
+        team = teams[i]
+        if team and meets_team_requirements(table.experience[team], config.min_experience_req,
+                                            config.min_team_size, config.require_experienced):
+            continue
+        if team:
+            added = _complete_team(table, team, d, slot["shift"], config)
+        else:
+            candidates = filter_nattjour(table, np.flatnonzero(table.available(d)), slot["shift"], config)
+            picked, _ = find_best_team(shift_costs(table, candidates, slot["shift"]),
+                                       table.experience[candidates], config.min_experience_req,
+                                       config.min_team_size, config.require_experienced)
+            added = None if picked is None else candidates[picked].tolist()
+        if added is None:
+            if team:
+                # Teamet går inte att rädda, frigör de kvarvarande
+                table.worked_shifts[team] -= 1
+                table.assigned[team, d] = False
+                teams[i] = []
+            trace.info("reparation", "❌ Kunde inte reparera passet", day=slot["date"], shift=slot["shift"])
+            continue
+        if added:
+            table.assign(np.array(added), d)
+            teams[i] = team + added
+            trace.info("reparation", "🔧 Reparerat: {}", NameList(staff, teams[i]), day=slot["date"], shift=slot["shift"])
+
+    # Ett avbrutet schema förblir avbrutet: reparationen fyller inte i de dagar som saknas
+    repaired = ScheduleResult(config=config, staff=staff, trace=trace, cancelled=result.cancelled,
+                              feasibility=check_feasibility(staff, config))
+    for item, team in zip(result.slots, teams):
+        assigned = [staff[r] for r in team] or None
+        if not assigned:
+            repaired.failed_days.setdefault(item["slot"]["date"], []).append(failure_reason(item["slot"], config))
+        repaired.slots.append({"slot": item["slot"], "assigned": assigned})
+    repaired.worked_shifts = table.worked_by_id()
+    return repaired
@@ -0,0 +1,90 @@
+# scheduler/search.py
+import numpy as np
+
+from scheduler.timing import count, timed
+
+FAIRNESS_EPS = 1e-9
+EXPERIENCED_LEVEL = 4  # Erfarenhet som räknas som "erfaren" för require_experienced
+
+def meets_team_requirements(experience, min_exp_req, min_team_size, require_experienced):
+    """experience är erfarenheten för teamets medlemmar (array eller lista)."""
+    experience = np.asarray(experience)
+    if len(experience) < min_team_size:
+        return False
+    if experience.sum() < min_exp_req:
+        return False
+    if require_experienced and not (experience >= EXPERIENCED_LEVEL).any():
+        return False
+    return True
+
+def cover_requirements(weights, experience, need_count, need_exp, need_experienced):
+    """
+    Väljer de billigaste extra kandidaterna (weights sorterade stigande, parallellt
+    med experience) så att kvarvarande krav på antal, erfarenhetssumma och erfaren
+    medlem uppfylls. Tillstånden är de kvarvarande kraven, så sökrymden är högst
+    min_team_size × min_exp_req × 2 oavsett antal kandidater.
+    Returnerar en lista med positioner eller None.
+    """
+    goal = (0, 0, False)
+    best = {(need_count, need_exp, need_experienced): (0.0, ())}
+    for pos, (weight, exp_val) in enumerate(zip(weights.tolist(), experience.tolist())):
+        if goal in best and best[goal][0] <= weight:
+            # Resten av poolen är minst lika dyr och kan inte förbättra resultatet
+            break
+        updates = {}
+        for (cnt, exp, senior), (w, members) in best.items():
+            if (cnt, exp, senior) == goal:
+                continue
+            nxt = (max(0, cnt - 1), max(0, exp - exp_val), senior and exp_val < EXPERIENCED_LEVEL)
+            current = updates.get(nxt, best.get(nxt))
+            if current is None or w + weight < current[0]:
+                updates[nxt] = (w + weight, members + (pos,))
+        best.update(updates)
+    count("cover_states", len(best))
+    if goal not in best:
+        return None
+    return list(best[goal][1])
+
+@timed("search.find_best_team")
+def find_best_team(costs, experience, min_exp_req, min_team_size, require_experienced):
+    """
+    Hittar teamet med lägst genomsnittlig kostnad (fairness) utan att gå igenom
+    alla kombinationer. costs och experience är parallella arrayer över kandidaterna.
+
+    Kraven blir aldrig svårare att uppfylla när fler läggs till i teamet. För ett
+    givet snitt λ tas därför alla med kostnad < λ med, och resten fylls på så
+    billigt som möjligt via cover_requirements. λ sänks tills inget team kan slå
+    det (Dinkelbach-iteration), vilket ger samma lägsta fairness som en
+    fullständig genomsökning.
+
+    Lika kostnader avgörs av kandidaternas ordning; blanda dem med en seedad
+    slumpgenerator innan anropet för reproducerbara men varierade val.
+    Returnerar (index i costs, fairness) eller (None, None) om inget giltigt team finns.
+    """
+    costs = np.asarray(costs, dtype=float)
+    experience = np.asarray(experience)
+    if not meets_team_requirements(experience, min_exp_req, min_team_size, require_experienced):
+        return None, None
+    order = np.argsort(costs, kind="stable")
+    sorted_costs = costs[order]
+    sorted_exp = experience[order]
+    team = np.arange(len(order))
+    target = sorted_costs.mean()
+    count("team_searches")
+    while True:
+        count("search_iterations")
+        # Kostnaderna är sorterade, så "alla under λ" är ett prefix
+        k = int(np.searchsorted(sorted_costs, target - FAIRNESS_EPS, side="left"))
+        extra = cover_requirements(
+            np.maximum(0.0, sorted_costs[k:] - target),
+            sorted_exp[k:],
+            max(0, min_team_size - k),
+            max(0, min_exp_req - int(sorted_exp[:k].sum())),
+            bool(require_experienced and not (sorted_exp[:k] >= EXPERIENCED_LEVEL).any())
+        )
+        team = np.concatenate([np.arange(k), k + np.asarray(extra, dtype=int)])
+        gain = (sorted_costs[team] - target).sum()
+        if gain >= -FAIRNESS_EPS:
+            break
+        target = sorted_costs[team].mean()
+    return order[team], float(sorted_costs[team].mean())
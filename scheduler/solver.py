@@ -0,0 +1,340 @@
+# scheduler/solver.py
+import math
+import random
+import time
+
+import numpy as np
+
+from scheduler.config import SHIFT_PREF_MAP
+from scheduler.engine import ScheduleResult, failure_reason, generate_schedule
+from scheduler.search import find_best_team, meets_team_requirements
+from scheduler.staff import StaffTable
+
+UNFILLED_COST = 1000.0  # Ett ofyllt pass väger tyngre än alla rättvise- och preferenskostnader
+NATTJOUR_COST = 10.0    # Extra kostnad för icke-Nattjour på nattpass när prioritize_nattjour är satt
+CAPACITY_COST = 100.0   # Används bara när ett ofyllt pass måste låna någon som nått max_shifts
+BALANCE_WEIGHT = 10.0   # Vikt för spridningen i belastning (worked_shifts / max_shifts)
+# Simulerad kylning: så länge fler pass är ofyllda än förhandskontrollen visar är
+# oundvikligt söks brett (REPAIR_TEMPERATURE, försämringar av storleksordningen ett
+# preferensstraff accepteras), därefter kyls det geometriskt från START_TEMPERATURE
+# till END_TEMPERATURE för att finslipa rättvisan.
+REPAIR_TEMPERATURE = 1.0
+START_TEMPERATURE = 0.02
+END_TEMPERATURE = 0.0001
+
+
+class PeriodModel:
+    """
+    Hela periodens tilldelning som ett sökproblem.
+
+    teams[s] är raderna (index i staff) som arbetar pass s och where[r, d] vilket
+    pass rad r har dag d (-1 = ledig). Kostnaden är
+        UNFILLED_COST × ofyllda pass
+        + summan av preferensstraff för alla tilldelningar
+        + BALANCE_WEIGHT × Σ (andel − medelandel)², andel = worked_shifts / max_shifts,
+    där den sista termen jämnar ut belastningen. Alla ändringar går via _add och
+    _remove som uppdaterar summorna inkrementellt och loggar för att kunna ångras.
+    """
+    def __init__(self, result, config):
+        self.config = config
+        self.staff = result.staff
+        self.table = StaffTable(result.staff, config.period_length)
+        self.slots = [item["slot"] for item in result.slots]
+        n_shifts = len(config.shift_templates)
+        self.slot_day = [i // n_shifts for i in range(len(self.slots))]
+        self.slot_type = [i % n_shifts for i in range(len(self.slots))]
+
+        n = len(self.staff)
+        self.penalty = np.zeros((n, n_shifts))
+        has_nattjour = self.table.has_work_type(slice(None), "Nattjour")
+        for t, template in enumerate(config.shift_templates):
+            pref_required = SHIFT_PREF_MAP.get(template["shift"])
+            if pref_required:
+                self.penalty[:, t] = ~self.table.has_work_type(slice(None), pref_required)
+            else:
+                self.penalty[:, t] = 1.0
+            if template["shift"] == "Natt" and config.prioritize_nattjour and has_nattjour.any():
+                self.penalty[:, t] += NATTJOUR_COST * ~has_nattjour
+
+        self.teams = [[] for _ in self.slots]
+        self.where = np.full((n, config.period_length), -1, dtype=np.int64)
+        self.worked = self.table.worked_shifts
+        self.max_shifts = self.table.max_shifts
+        self.base_cost = UNFILLED_COST * len(self.slots)
+        self.unfilled = len(self.slots)
+        self.sum_ratio = 0.0
+        self.sum_sq_ratio = 0.0
+        self.log = []
+        row_of = {s["id"]: i for i, s in enumerate(self.staff)}
+        for s, item in enumerate(result.slots):
+            for emp in item["assigned"] or []:
+                self._add(row_of[emp["id"]], s)
+        self.log.clear()
+
+    @property
+    def cost(self):
+        n = len(self.staff)
+        if not n:
+            return self.base_cost
+        return self.base_cost + BALANCE_WEIGHT * (self.sum_sq_ratio - self.sum_ratio ** 2 / n)
+
+    # ---------- PRIMITIVER ----------
+    def _shift_ratio(self, r, old, new):
+        old_ratio = old / self.max_shifts[r]
+        new_ratio = new / self.max_shifts[r]
+        self.sum_ratio += new_ratio - old_ratio
+        self.sum_sq_ratio += new_ratio ** 2 - old_ratio ** 2
+
+    def _add(self, r, s):
+        w = self.worked[r]
+        self.base_cost += self.penalty[r, self.slot_type[s]]
+        self._shift_ratio(r, w, w + 1)
+        if w >= self.max_shifts[r]:
+            self.base_cost += CAPACITY_COST
+        if not self.teams[s]:
+            self.base_cost -= UNFILLED_COST
+            self.unfilled -= 1
+        self.teams[s].append(r)
+        self.where[r, self.slot_day[s]] = s
+        self.worked[r] = w + 1
+        self.log.append(("add", r, s))
+
+    def _remove(self, r, s):
+        w = self.worked[r]
+        self.base_cost -= self.penalty[r, self.slot_type[s]]
+        self._shift_ratio(r, w, w - 1)
+        if w > self.max_shifts[r]:
+            self.base_cost -= CAPACITY_COST
+        self.teams[s].remove(r)
+        if not self.teams[s]:
+            self.base_cost += UNFILLED_COST
+            self.unfilled += 1
+        self.where[r, self.slot_day[s]] = -1
+        self.worked[r] = w - 1
+        self.log.append(("remove", r, s))
+
+    def _undo(self, mark):
+        while len(self.log) > mark:
+            op, r, s = self.log.pop()
+            if op == "add":
+                self._remove(r, s)
+            else:
+                self._add(r, s)
+            self.log.pop()
+
+    def _valid(self, s):
+        team = self.teams[s]
+        if not team:
+            return True
+        return meets_team_requirements(self.table.experience[team], self.config.min_experience_req,
+                                       self.config.min_team_size, self.config.require_experienced)
+
+    def _free_rows(self, day, with_capacity=True):
+        free = self.where[:, day] == -1
+        if with_capacity:
+            free &= self.worked < self.max_shifts
+        return np.flatnonzero(free)
+
+    # ---------- DRAG ----------
+    def fill(self, s, rng):
+        """Försöker fylla ett ofyllt pass, vid behov genom att flytta bort folk från andra pass."""
+        day = self.slot_day[s]
+        for with_capacity in (True, False):
+            rows = self._free_rows(day, with_capacity)
+            if not len(rows):
+                continue
+            rows = rows[rng.sample(range(len(rows)), len(rows))]
+            costs = self.penalty[rows, self.slot_type[s]] + self.worked[rows] / self.max_shifts[rows]
+            costs = costs + CAPACITY_COST * (self.worked[rows] >= self.max_shifts[rows])
+            picked, _ = find_best_team(costs, self.table.experience[rows], self.config.min_experience_req,
+                                       self.config.min_team_size, self.config.require_experienced)
+            if picked is not None:
+                break
+        else:
+            return []
+        touched = [s]
+        for r in rows[picked].tolist():
+            self._add(r, s)
+            if self.worked[r] > self.max_shifts[r]:
+                # Lös ut personen från ett annat pass där teamet klarar sig utan hen
+                others = [o for o in np.unique(self.where[r]).tolist() if o >= 0 and o != s]
+                rng.shuffle(others)
+                for o in others:
+                    self._remove(r, o)
+                    if self._valid(o) and self.teams[o]:
+                        touched.append(o)
+                        break
+                    # Ersätt med den mest erfarna som är ledig den dagen och har pass kvar
+                    subs = self._free_rows(self.slot_day[o])
+                    if len(subs):
+                        q = int(subs[np.argmax(self.table.experience[subs])])
+                        self._add(q, o)
+                        if self._valid(o):
+                            touched.append(o)
+                            break
+                        self._remove(q, o)
+                    self._add(r, o)
+                else:
+                    return []
+        return touched
+
+    def replace(self, s, rng):
+        team = self.teams[s]
+        if not team:
+            return []
+        r = rng.choice(team)
+        rows = self._free_rows(self.slot_day[s])
+        if not len(rows):
+            return []
+        if rng.random() < 0.5:
+            q = int(rows[rng.randrange(len(rows))])
+        else:
+            # Bästa ersättaren enligt preferens och lägst belastning
+            delta = self.penalty[rows, self.slot_type[s]] + self.worked[rows] / self.max_shifts[rows]
+            q = int(rows[np.argmin(delta)])
+        self._remove(r, s)
+        self._add(q, s)
+        return [s]
+
+    def drop(self, s, rng):
+        team = self.teams[s]
+        if len(team) <= self.config.min_team_size:
+            return []
+        self._remove(rng.choice(team), s)
+        return [s]
+
+    def swap(self, s1, s2, rng):
+        """Byter en person i s1 mot en i s2 (olika dagar) så att båda får ett annat pass."""
+        d1, d2 = self.slot_day[s1], self.slot_day[s2]
+        if d1 == d2 or not self.teams[s1] or not self.teams[s2]:
+            return []
+        r = rng.choice(self.teams[s1])
+        q = rng.choice(self.teams[s2])
+        if self.where[r, d2] != -1 or self.where[q, d1] != -1:
+            return []
+        self._remove(r, s1)
+        self._remove(q, s2)
+        self._add(q, s1)
+        self._add(r, s2)
+        return [s1, s2]
+
+
+# Hur ofta (i iterationer) optimeringen rapporterar framsteg och kollar om den ska avbrytas
+PROGRESS_INTERVAL = 500
+# Tidsbudgeten räknas om till ett fast antal iterationer så att samma frö ger samma schema
+# oavsett maskin och belastning. Värdet är lågt räknat; en vanlig dator hinner 3–10 gånger fler.
+ITERATIONS_PER_SECOND = 10000
+# Klockan används bara som nödbroms: sökningen avbryts om den tar så här många gånger tidsbudgeten
+TIME_LIMIT_FACTOR = 3.0
+
+def optimize_schedule(employees, config, time_budget=None, max_iterations=None, progress=None, cancel=None):
+    """
+    Optimerar hela perioden på en gång i stället för dag för dag.
+
+    Startar från den giriga lösningen och förbättrar den med lokalsökning
+    (simulerad kylning) över hela perioden: fyller ofyllda pass genom att flytta
+    folk från pass som klarar sig utan dem, byter ut och byter pass mellan dagar
+    och tar bort överflödiga teammedlemmar. Samma krav gäller som i
+    generate_schedule (erfarenhetssumma, erfaren medlem, max_shifts och ett pass
+    per dag); Nattjour-prioriteringen är ett högt straff snarare än ett filter.
+
+    Sökningen kör max_iterations iterationer (standard time_budget ×
+    ITERATIONS_PER_SECOND, time_budget standard config.time_budget) och
+    temperaturen följer iterationsnumret, inte klockan, så samma frö ger exakt
+    samma schema. Bara om sökningen tar mer än TIME_LIMIT_FACTOR × time_budget
+    sekunder avbryts den av klockan; då noteras i spårningen att schemat inte
+    går att återskapa. Det bästa schemat som hittats returneras.
+    progress anropas med (andel av iterationerna, None) och cancel avbryter
+    sökningen i förtid, se generate_schedule. Ett avbrutet optimeringssteg ger
+    ändå ett komplett schema; bara den giriga fasen kan lämna ett ofullständigt.
+    """
+    start = time.perf_counter()
+    time_budget = config.time_budget if time_budget is None else time_budget
+    if max_iterations is None:
+        max_iterations = int(time_budget * ITERATIONS_PER_SECOND)
+    greedy = generate_schedule(employees, config, cancel=cancel)
+    if greedy.cancelled:
+        return greedy
+    model = PeriodModel(greedy, config)
+    rng = random.Random(config.seed)
+    # Så många pass blir ofyllda oavsett vad sökningen gör (se check_feasibility)
+    min_unfilled = greedy.feasibility.min_unfilled if greedy.feasibility else 0
+
+    best_cost = initial_cost = model.cost
+    best_teams = [team[:] for team in model.teams]
+    initial_unfilled = greedy.unfilled_count()
+    n_slots = len(model.slots)
+    iterations = 0
+    deadline = start + TIME_LIMIT_FACTOR * time_budget
+    timed_out = False
+    while n_slots and iterations < max_iterations:
+        if iterations % PROGRESS_INTERVAL == 0:
+            if cancel is not None and cancel.is_set():
+                break
+            if time.perf_counter() > deadline:
+                timed_out = True
+                break
+            if progress is not None:
+                progress(iterations / max_iterations, None)
+        # Temperaturen sjunker geometriskt från START_TEMPERATURE till END_TEMPERATURE med iterationerna
+        temperature = START_TEMPERATURE * (END_TEMPERATURE / START_TEMPERATURE) ** (iterations / max_iterations)
+        iterations += 1
+        if model.unfilled > min_unfilled:
+            temperature = REPAIR_TEMPERATURE
+
+        mark = len(model.log)
+        before = model.cost
+        unfilled = [s for s, team in enumerate(model.teams) if not team] \
+            if model.unfilled > min_unfilled and rng.random() < 0.2 else []
+        if unfilled:
+            touched = model.fill(rng.choice(unfilled), rng)
+        else:
+            move = rng.random()
+            s = rng.randrange(n_slots)
+            if move < 0.45:
+                touched = model.replace(s, rng)
+            elif move < 0.6:
+                touched = model.drop(s, rng)
+            else:
+                touched = model.swap(s, rng.randrange(n_slots), rng)
+        if not touched:
+            model._undo(mark)
+            continue
+        delta = model.cost - before
+        if not all(model._valid(t) for t in touched) or (
+                delta > 0 and rng.random() >= math.exp(-delta / temperature)):
+            model._undo(mark)
+            continue
+        model.log.clear()
+        if model.cost < best_cost - 1e-9:
+            best_cost = model.cost
+            best_teams = [team[:] for team in model.teams]
+
+    result = ScheduleResult(config=config, staff=greedy.staff, trace=greedy.trace, feasibility=greedy.feasibility)
+    worked = {s["id"]: 0 for s in greedy.staff}
+    for s, slot in enumerate(model.slots):
+        assigned = [model.staff[r] for r in best_teams[s]] or None
+        if assigned:
+            for emp in assigned:
+                worked[emp["id"]] += 1
+        else:
+            result.failed_days.setdefault(slot["date"], []).append(failure_reason(slot, config))
+        result.slots.append({"slot": slot, "assigned": assigned})
+    result.worked_shifts = worked
+    result.trace.info("optimering", "Optimering: {} iterationer på {:.2f} s, ofyllda pass {} → {}, kostnad {:.2f} → {:.2f}",
+                      iterations, time.perf_counter() - start, initial_unfilled, result.unfilled_count(),
+                      initial_cost, best_cost)
+    if timed_out:
+        result.trace.info("optimering", "⚠️ Tidsgränsen nåddes efter {} av {} iterationer; "
+                          "schemat kan inte återskapas exakt med samma frö", iterations, max_iterations)
+    return result
+
+
+ENGINES = {
+    "greedy": generate_schedule,
+    "optimize": optimize_schedule
+}
+
+def run_engine(employees, config, progress=None, cancel=None):
+    """Kör den motor som config.engine anger ("greedy" eller "optimize")."""
+    return ENGINES[config.engine](employees, config, progress=progress, cancel=cancel)
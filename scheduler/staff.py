@@ -0,0 +1,74 @@
+# scheduler/staff.py
+import numpy as np
+
+from scheduler.worktypes import WORK_TYPE_BITS
+
+def get_initials(name):
+    parts = name.split()
+    return "".join(p[0].upper() for p in parts if p)
+
+def max_shifts_for(workload, period_length):
+    """Max antal pass under perioden utifrån arbetsbelastning i procent (minst 1)."""
+    return max(1, round((workload / 100) * period_length))
+
+def build_staff(employees, period_length):
+    """
+    Konverterar rader från employees-tabellen
+    (id, hospital, name, workload, work_mask, min_days_off, experience, last_updated),
+    t.ex. database.Employee, till en lista med dicts som schemaläggaren använder.
+    """
+    staff = []
+    for e in employees:
+        try:
+            exp_val = int(e[6])  # experience ligger på index 6
+        except (TypeError, ValueError):
+            exp_val = 0
+        staff.append({
+            "id": e[0],
+            "name": e[2],
+            "workload_percent": e[3],
+            "work_mask": e[4] or 0,
+            "min_days_off": e[5],
+            "experience": exp_val,
+            "max_shifts": max_shifts_for(e[3], period_length)
+        })
+    return staff
+
+class StaffTable:
+    """
+    Kolumnbaserad personalstatus för tilldelningsloopen.
+
+    Rad i motsvarar staff[i]. Erfarenhet, max_shifts, arbetade pass och
+    arbetsformer (som bitmask) ligger i NumPy-arrayer, och assigned är en
+    (anställda × dagar)-matris med de dagar varje anställd redan har ett pass.
+    Kandidatfiltrering och kostnader blir då vektoriserade operationer över
+    hela personalstyrkan.
+    """
+    def __init__(self, staff, n_days):
+        self.staff = staff
+        self.ids = np.array([s["id"] for s in staff], dtype=np.int64)
+        self.experience = np.array([s["experience"] for s in staff], dtype=np.int64)
+        self.max_shifts = np.array([s["max_shifts"] for s in staff], dtype=np.int64)
+        self.work_mask = np.array([s["work_mask"] for s in staff], dtype=np.int64)
+        self.worked_shifts = np.zeros(len(staff), dtype=np.int64)
+        self.assigned = np.zeros((len(staff), n_days), dtype=bool)
+
+    def __len__(self):
+        return len(self.staff)
+
+    def ratios(self, rows=slice(None)):
+        return self.worked_shifts[rows] / self.max_shifts[rows]
+
+    def available(self, day_index):
+        """Bool-array över de som är lediga dag day_index och inte nått max_shifts."""
+        return ~self.assigned[:, day_index] & (self.worked_shifts < self.max_shifts)
+
+    def has_work_type(self, rows, work_type):
+        return (self.work_mask[rows] & WORK_TYPE_BITS.get(work_type, 0)) != 0
+
+    def assign(self, rows, day_index):
+        self.worked_shifts[rows] += 1
+        self.assigned[rows, day_index] = True
+
+    def worked_by_id(self):
+        return dict(zip(self.ids.tolist(), self.worked_shifts.tolist()))
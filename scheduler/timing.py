@@ -0,0 +1,84 @@
+# scheduler/timing.py
+import contextvars
+import functools
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+logger = logging.getLogger("vardschema.timing")
+
+_current = contextvars.ContextVar("vardschema_timings", default=None)
+
+class Timings:
+    """
+    Tider och räknare för en körning.
+
+    stages håller (antal anrop, total tid i sekunder) per steg och counters
+    fria räknare, t.ex. antal kandidater per pass eller teamsökningar.
+    """
+    def __init__(self):
+        self.stages = {}
+        self.counters = Counter()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            calls, total = self.stages.get(name, (0, 0.0))
+            self.stages[name] = (calls + 1, total + time.perf_counter() - start)
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def rows(self):
+        """Stegen sorterade på total tid, för visning i en tabell."""
+        return [{"Steg": name, "Anrop": calls, "Total (ms)": round(total * 1000, 2),
+                 "Snitt (ms)": round(total * 1000 / calls, 3)}
+                for name, (calls, total) in sorted(self.stages.items(), key=lambda x: -x[1][1])]
+
+    def as_dict(self):
+        return {
+            "stages": {name: {"calls": calls, "seconds": round(total, 6)}
+                       for name, (calls, total) in self.stages.items()},
+            "counters": dict(self.counters)
+        }
+
+    def log(self, level=logging.INFO):
+        if not self.stages and not self.counters:
+            return
+        parts = [f"{name}={total * 1000:.1f}ms/{calls}" for name, (calls, total) in self.stages.items()]
+        parts += [f"{name}={value}" for name, value in self.counters.items()]
+        logger.log(level, "Tidsmätning: %s", " ".join(parts))
+
+@contextmanager
+def collect(timings=None):
+    """Samlar alla stage()/count()-anrop inom blocket i ett Timings-objekt."""
+    timings = timings if timings is not None else Timings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+def stage(name):
+    """Kontexthanterare som tar tid på name om en insamling pågår, annars gör den ingenting."""
+    timings = _current.get()
+    return timings.stage(name) if timings is not None else nullcontext()
+
+def count(name, n=1):
+    timings = _current.get()
+    if timings is not None:
+        timings.count(name, n)
+
+def timed(name):
+    """Dekorator som tar tid på varje anrop av funktionen under steget name."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,70 @@
+# scheduler/trace.py
+import csv
+import io
+from collections import deque
+
+# Nivåer: OFF loggar ingenting, INFO tilldelningar och misslyckanden, DEBUG även kandidatlistor
+TRACE_OFF = 0
+TRACE_INFO = 1
+TRACE_DEBUG = 2
+TRACE_LEVEL_NAMES = {TRACE_OFF: "Av", TRACE_INFO: "Info", TRACE_DEBUG: "Debug"}
+
+TRACE_COLUMNS = ["Nivå", "Datum", "Skift", "Händelse", "Meddelande"]
+
+class NameList:
+    """Namnen på raderna rows i staff, sammanfogade först när de visas."""
+    def __init__(self, staff, rows):
+        self.staff = staff
+        self.rows = rows
+
+    def __str__(self):
+        return ", ".join(self.staff[i]["name"] for i in self.rows)
+
+class Trace:
+    """
+    Nivåstyrd spårning av schemagenereringen med lat formatering.
+
+    Poster sparas som (nivå, datum, skift, händelse, format, argument) i en
+    ringbuffert med max_records platser; texten byggs först i rows(). På nivå
+    TRACE_OFF kostar ett anrop bara en jämförelse.
+    """
+    def __init__(self, level=TRACE_OFF, max_records=10000):
+        self.level = level
+        self.records = deque(maxlen=max_records)
+        self.dropped = 0
+
+    def enabled(self, level):
+        return self.level >= level
+
+    def log(self, level, event, fmt, *args, day=None, shift=None):
+        if self.level < level:
+            return
+        if len(self.records) == self.records.maxlen:
+            self.dropped += 1
+        self.records.append((level, day, shift, event, fmt, args))
+
+    def info(self, event, fmt, *args, day=None, shift=None):
+        self.log(TRACE_INFO, event, fmt, *args, day=day, shift=shift)
+
+    def debug(self, event, fmt, *args, day=None, shift=None):
+        self.log(TRACE_DEBUG, event, fmt, *args, day=day, shift=shift)
+
+    def __len__(self):
+        return len(self.records)
+
+    def rows(self):
+        """Formaterar posterna till dicts med TRACE_COLUMNS som nycklar."""
+        return [{
+            "Nivå": TRACE_LEVEL_NAMES[level],
+            "Datum": day.strftime("%Y-%m-%d") if day else "",
+            "Skift": shift or "",
+            "Händelse": event,
+            "Meddelande": fmt.format(*args) if args else fmt
+        } for level, day, shift, event, fmt, args in self.records]
+
+    def to_csv(self):
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=TRACE_COLUMNS)
+        writer.writeheader()
+        writer.writerows(self.rows())
+        return output.getvalue()
@@ -0,0 +1,17 @@
+# scheduler/worktypes.py
+
+# Bitmask per arbetsform, samma alternativ som i formulären. Ordningen är en del
+# av databasformatet (kolumnen employees.work_mask) och får bara byggas på i slutet.
+WORK_TYPES = ["Nattjour", "Dagskift", "Kvällsskift", "Helg", "Administration"]
+WORK_TYPE_BITS = {name: 1 << i for i, name in enumerate(WORK_TYPES)}
+
+def work_type_mask(work_types):
+    """Slår ihop en lista med arbetsformer till en heltalsmask (okända former ignoreras)."""
+    mask = 0
+    for wt in work_types:
+        mask |= WORK_TYPE_BITS.get(wt.strip(), 0)
+    return mask
+
+def work_type_names(mask):
+    """Arbetsformerna i mask, i samma ordning som WORK_TYPES."""
+    return [name for name in WORK_TYPES if mask & WORK_TYPE_BITS[name]]
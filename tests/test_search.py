@@ -0,0 +1,54 @@
+# tests/test_search.py
+"""
+Jämför find_best_team med en fullständig genomsökning av alla kombinationer
+(itertools.combinations) på slumpade små personalgrupper.
+"""
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+from scheduler.search import EXPERIENCED_LEVEL, find_best_team, meets_team_requirements
+
+def brute_force(costs, experience, min_exp_req, min_team_size, require_experienced):
+    """Lägsta genomsnittliga kostnad bland alla giltiga team, eller None om inget finns."""
+    best = None
+    for size in range(max(1, min_team_size), len(costs) + 1):
+        for team in itertools.combinations(range(len(costs)), size):
+            team = list(team)
+            if not meets_team_requirements(experience[team], min_exp_req, min_team_size, require_experienced):
+                continue
+            fairness = costs[team].mean()
+            if best is None or fairness < best:
+                best = fairness
+    return best
+
+def random_case(rng):
+    """Kostnader som i motorn (andel av max_shifts + ev. straff 1) med många lika värden."""
+    n = rng.randint(1, 9)
+    costs = np.array([rng.randint(0, 4) / rng.choice([2, 4]) + rng.choice([0, 0, 1]) for _ in range(n)])
+    experience = np.array([rng.randint(1, 6) for _ in range(n)])
+    min_exp_req = rng.randint(0, 15)
+    min_team_size = rng.randint(1, 5)
+    require_experienced = rng.random() < 0.5
+    return costs, experience, min_exp_req, min_team_size, require_experienced
+
+@pytest.mark.parametrize("seed", range(300))
+def test_find_best_team_matches_brute_force(seed):
+    costs, experience, min_exp_req, min_team_size, require_experienced = random_case(random.Random(seed))
+    expected = brute_force(costs, experience, min_exp_req, min_team_size, require_experienced)
+    team, fairness = find_best_team(costs, experience, min_exp_req, min_team_size, require_experienced)
+
+    if expected is None:
+        assert team is None and fairness is None
+        return
+    assert team is not None
+    assert len(set(team.tolist())) == len(team)
+    assert meets_team_requirements(experience[team], min_exp_req, min_team_size, require_experienced)
+    assert fairness == pytest.approx(costs[team].mean(), abs=1e-9)
+    assert fairness == pytest.approx(expected, abs=1e-9)
+
+def test_require_experienced_without_senior_staff():
+    experience = np.full(5, EXPERIENCED_LEVEL - 1)
+    assert find_best_team(np.zeros(5), experience, 0, 2, True) == (None, None)